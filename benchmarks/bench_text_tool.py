@@ -0,0 +1,163 @@
+"""Before/after timings for the detection, cleaning, regex split and parallel merge paths.
+
+    python benchmarks/bench_text_tool.py [--mb 64] [--chapters 100000] [--workers 1 2 4]
+
+Each "old" function is the pre-optimisation code kept verbatim for comparison.
+The cleaner backends are also timed against each other (regex vs NumPy lookup table)
+at several replacement densities and block sizes, which is what NUMPY_CLEAN_DENSITY
+and NUMPY_CLEAN_THRESHOLD are tuned from.
+"""
+import argparse
+import importlib.util
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+import chardet
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_text_tool():
+    spec = importlib.util.spec_from_file_location("text_tool", os.path.join(ROOT, "text_tool_0.4.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["text_tool"] = module
+    spec.loader.exec_module(module)
+    return module
+
+tt = load_text_tool()
+
+def old_read_text_with_autodetect(file_path):
+    with open(file_path, "rb") as f:
+        raw = f.read()
+    detected = chardet.detect(raw)
+    enc_candidate = detected["encoding"]
+    for e in ["gb18030", enc_candidate, "utf-8", "cp949"]:
+        if not e: continue
+        try:
+            return raw.decode(e, errors="strict"), e
+        except (UnicodeDecodeError, LookupError):
+            continue
+    final_enc = enc_candidate if enc_candidate else "utf-8"
+    return raw.decode(final_enc, errors="replace"), final_enc
+
+def old_final_clean_for_save(text):
+    if not text: return ""
+    text = text.replace('\ufffd', ' ')
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', ' ', text)
+    text = re.sub(r'[\uE000-\uF8FF\uD800-\uDFFF]', ' ', text)
+    for ws in ['\u3000', '\ufeff', '\xa0', '\u200b', '\u200c', '\u200d']:
+        text = text.replace(ws, ' ')
+    return text
+
+def old_regex_chunks(text, val):
+    parts = re.split(f"({val})", text)
+    chunks, current = [], ""
+    for p in parts:
+        if re.match(val, p):
+            if current: chunks.append(current)
+            current = p
+        else: current += p
+    if current: chunks.append(current)
+    return chunks
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+def report(name, old, new):
+    print(f"{name:<28} old {old:7.3f}s  new {new:7.3f}s  x{old / max(new, 1e-9):.1f}")
+
+def book_text(chapters, body="中文内容，这是正文。　\n" * 8):
+    return "".join(f"第{i}章 标题\n{body}" for i in range(1, chapters + 1))
+
+def bench_detect(tmp, mb):
+    text = book_text(max(1, mb * 1024 * 1024 // 300))
+    for enc in ("gb18030", "utf-8"):
+        path = os.path.join(tmp, f"detect_{enc}.txt")
+        with open(path, "wb") as f:
+            f.write(text.encode(enc))
+        old, _ = timed(old_read_text_with_autodetect, path)
+        new, _ = timed(tt.read_text_with_autodetect, path, tt.DETECT_SAMPLE_SIZE, False)
+        report(f"detect {enc} ({os.path.getsize(path) >> 20}MB)", old, new)
+
+def bench_clean(mb):
+    text = book_text(max(1, mb * 1024 * 1024 // 300))
+    old, expected = timed(old_final_clean_for_save, text)
+    new, cleaned = timed(tt.TEXT_CLEANER.clean, text)
+    assert cleaned == expected
+    report(f"clean ({len(text) >> 20}M chars)", old, new)
+
+CLEAN_DENSITIES = (0.0, 0.005, 0.02, 0.05, 0.2, 0.5)
+CLEAN_BLOCKS = (64 * 1024, 1024 * 1024, 16 * 1024 * 1024)
+
+def density_text(chars, density, seed=0):
+    # CJK text where about `density` of the characters are ones the cleaner replaces
+    rng = random.Random(seed)
+    dirty = "\u3000\xa0\ufffd\x07\ue000"
+    return "".join(rng.choice(dirty) if rng.random() < density else "中" for _ in range(chars))
+
+def bench_clean_backends(mb):
+    if tt.np is None:
+        print("clean backends: numpy not installed, skipped")
+        return
+    python, numpy = tt.TextCleaner(backend="python"), tt.TextCleaner(backend="numpy")
+    numpy.clean("x")  # build the lookup table outside the timings
+    total = mb * 1024 * 1024
+    print(f"clean backends: {total >> 20}M chars per row, cleaned in blocks (auto picks numpy at "
+          f">= {tt.NUMPY_CLEAN_THRESHOLD >> 20}M and density >= {tt.NUMPY_CLEAN_DENSITY})")
+    for density in CLEAN_DENSITIES:
+        sample = density_text(1024 * 1024, density)
+        for block in CLEAN_BLOCKS:
+            text = sample * max(1, block // len(sample)) if block >= len(sample) else sample[:block]
+            repeat = max(1, total // len(text))
+            regex, expected = timed(lambda: [python.clean(text) for _ in range(repeat)][-1])
+            lut, cleaned = timed(lambda: [numpy.clean(text) for _ in range(repeat)][-1])
+            assert cleaned == expected
+            print(f"  density {density:<6} block {len(text) >> 10:>6}K  python {regex:7.3f}s  numpy {lut:7.3f}s  x{regex / max(lut, 1e-9):.1f}")
+
+def bench_regex_split(chapters):
+    text = book_text(chapters, "正文\n" * 3)
+    old, expected = timed(old_regex_chunks, text, tt.CHAPTER_PATTERN)
+    new, bounds = timed(tt.regex_chunk_bounds, text, tt.CHAPTER_PATTERN)
+    assert [text[a:b] for a, b in bounds] == expected
+    report(f"regex split ({chapters} ch)", old, new)
+
+def bench_merge(tmp, workers_list, files=64, chapters=400):
+    src = os.path.join(tmp, "merge_in")
+    os.makedirs(src)
+    for i in range(1, files + 1):
+        with open(os.path.join(src, f"book_{i:07d}.txt"), "wb") as f:
+            f.write(book_text(chapters).encode("gb18030"))
+    inputs = [path for path, _ in tt.scan_text_files(src)]
+    base = None
+    for workers in workers_list:
+        out = os.path.join(tmp, f"merge_out_{workers}")
+        os.makedirs(out)
+        seconds, _ = timed(tt.run_merge, inputs, out, None, 4, workers)
+        base = base or seconds
+        print(f"merge {files} files, {workers} workers      {seconds:7.3f}s  x{base / seconds:.1f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=64)
+    parser.add_argument("--chapters", type=int, default=100000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp()
+    tt.ENCODING_CACHE = tt.EncodingCache(os.path.join(tmp, "cache.json"))
+    try:
+        bench_detect(tmp, args.mb)
+        bench_clean(args.mb)
+        bench_clean_backends(args.mb)
+        bench_regex_split(args.chapters)
+        bench_merge(tmp, args.workers)
+    finally:
+        shutil.rmtree(tmp)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+import importlib.util
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_text_tool():
+    # 파일 이름에 점이 있어 import 문으로는 못 불러옴
+    spec = importlib.util.spec_from_file_location("text_tool", os.path.join(ROOT, "text_tool_0.4.py"))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["text_tool"] = module  # 프로세스 풀이 모듈 함수를 찾을 수 있도록
+    spec.loader.exec_module(module)
+    return module
+
+tt = load_text_tool()
+
+def old_final_clean_for_save(text):
+    # 예전 TextToolApp.final_clean_for_save (아홉 번 훑는 버전) 그대로
+    if not text: return ""
+    text = text.replace('\ufffd', ' ')
+    text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', ' ', text)
+    text = re.sub(r'[\uE000-\uF8FF\uD800-\uDFFF]', ' ', text)
+    bad_ws = ['\u3000', '\ufeff', '\xa0', '\u200b', '\u200c', '\u200d']
+    for ws in bad_ws:
+        text = text.replace(ws, ' ')
+    return text
+
+def old_regex_chunks(text, val):
+    # 예전 run_split_thread 의 정규식 모드
+    parts = re.split(f"({val})", text)
+    chunks, current = [], ""
+    for p in parts:
+        if re.match(val, p):
+            if current: chunks.append(current)
+            current = p
+        else: current += p
+    if current: chunks.append(current)
+    return chunks
+
+def random_cuts(text, rng, max_block=200):
+    blocks, pos = [], 0
+    while pos < len(text):
+        n = rng.randint(1, max_block)
+        blocks.append(text[pos:pos + n])
+        pos += n
+    return blocks
+
+SAMPLE_PIECES = ["第12章 标题\n", "中文内容，。", "\r\n", "abc\n", "\U0001f600", "\u3000", "\ufffd", "\x07", "\xa0", "\ue000", " "]
+
+def sample_text(rng, n):
+    return "".join(rng.choice(SAMPLE_PIECES) for _ in range(n))
+
+class IsolatedCacheMixin:
+    # 사용자 홈의 인코딩 캐시를 건드리지 않도록 테스트마다 임시 캐시
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._cache = tt.ENCODING_CACHE
+        tt.ENCODING_CACHE = tt.EncodingCache(os.path.join(self.tmp.name, "cache.json"))
+
+    def tearDown(self):
+        tt.ENCODING_CACHE = self._cache
+        self.tmp.cleanup()
+
+class TextCleanerTest(unittest.TestCase):
+    def test_matches_old_cleaner_on_every_code_point(self):
+        every_char = "".join(map(chr, range(0x110000)))
+        expected = old_final_clean_for_save(every_char)
+        for backend in ("auto", "python", "numpy"):
+            self.assertEqual(tt.TextCleaner(backend=backend).clean(every_char), expected, backend)
+
+    def test_iter_clean_random_block_cuts(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            text = sample_text(rng, rng.randint(0, 300))
+            blocks = random_cuts(text, rng, 20)
+            self.assertEqual("".join(tt.TEXT_CLEANER.iter_clean(blocks)), old_final_clean_for_save(text))
+
+    def test_iter_clean_keeps_crlf_together(self):
+        blocks = list(tt.TEXT_CLEANER.iter_clean(["a\r", "\nb\r", "\r\n", "c"]))
+        self.assertEqual("".join(blocks), "a\r\nb\r\r\nc")
+        self.assertFalse(any(block.endswith("\r") for block in blocks[:-1]))
+
+@unittest.skipUnless(tt.np is not None, "numpy 없음")
+class StreamBackendTest(IsolatedCacheMixin, unittest.TestCase):
+    def test_large_stream_uses_numpy_for_every_block(self):
+        path = os.path.join(self.tmp.name, "big.txt")
+        body = "中文内容，这是正文。\u3000\xa0\n" * 8
+        text = "".join(f"第{i}章 标题\n{body}" for i in range(1, tt.NUMPY_CLEAN_THRESHOLD // 200))
+        with open(path, "wb") as f:
+            f.write(text.encode("utf-8"))
+        out_dir = os.path.join(self.tmp.name, "out")
+        os.makedirs(out_dir)
+        cleaner = tt.TEXT_CLEANER
+        with mock.patch.object(cleaner, "_clean_numpy", wraps=cleaner._clean_numpy) as numpy_clean, \
+             mock.patch.object(cleaner, "_clean_regex", wraps=cleaner._clean_regex) as regex_clean:
+            tt.split_file(path, out_dir, "big_S", "chars", "1000000")
+        self.assertGreater(numpy_clean.call_count, 1)
+        regex_clean.assert_not_called()
+        pieces = []
+        for name, _ in tt.scan_text_files(out_dir):
+            with open(name, encoding="utf-8") as f:
+                pieces.append(f.read())
+        self.assertEqual("".join(pieces), old_final_clean_for_save(text))
+
+    def test_small_or_sparse_streams_stay_on_regex(self):
+        cleaner = tt.TextCleaner()
+        dense = "\u3000a" * 1000
+        self.assertIs(cleaner._stream_clean(len(dense), dense).__func__, tt.TextCleaner._clean_regex)
+        sparse = "a" * 1000
+        self.assertIs(cleaner._stream_clean(tt.NUMPY_CLEAN_THRESHOLD, sparse).__func__, tt.TextCleaner._clean_regex)
+        self.assertIs(cleaner._stream_clean(tt.NUMPY_CLEAN_THRESHOLD, dense).__func__, tt.TextCleaner._clean_numpy)
+
+class SplitTest(unittest.TestCase):
+    CASES = (("regex", tt.CHAPTER_PATTERN), ("chars", "37"), ("lines", "5"), ("bytes", "120"))
+
+    def streamed_chunks(self, text, mode, val, rng, enc="utf-8"):
+        blocks = tt.TEXT_CLEANER.iter_clean(random_cuts(text, rng))
+        chunks = []
+        for no, piece in tt.iter_split_pieces(blocks, mode, val, overlap=64, enc=enc):
+            if no > len(chunks): chunks.append("")
+            chunks[no - 1] += piece
+        return chunks
+
+    def test_streaming_matches_in_memory(self):
+        rng = random.Random(2)
+        for enc in ("utf-8", "gb18030"):
+            for _ in range(40):
+                text = tt.TEXT_CLEANER.clean(sample_text(rng, rng.randint(0, 400)))
+                for mode, val in self.CASES:
+                    expected = [text[a:b] for a, b in tt.split_chunk_bounds(text, mode, val, enc)]
+                    self.assertEqual(self.streamed_chunks(text, mode, val, rng, enc), expected, (mode, enc))
+
+    def test_regex_matches_old_splitter(self):
+        rng = random.Random(3)
+        for _ in range(100):
+            text = sample_text(rng, rng.randint(0, 300))
+            expected = old_regex_chunks(text, tt.CHAPTER_PATTERN)
+            self.assertEqual([text[a:b] for a, b in tt.regex_chunk_bounds(text, tt.CHAPTER_PATTERN)], expected)
+
+    def test_split_file_overlap_covers_long_matches(self):
+        pattern = r"第[\s\S]+?章"
+        text = "".join(f"第{i}" + "正文内容\n" * 1500 + "章 标题\n" for i in range(300))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "long.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            expected = [text[a:b] for a, b in tt.split_chunk_bounds(text, "regex", pattern)]
+            with mock.patch.object(tt, "SPLIT_STREAM_THRESHOLD", 0):
+                for overlap, same in ((tt.SPLIT_OVERLAP, False), (32 * 1024, True)):
+                    out_dir = os.path.join(tmp, str(overlap))
+                    os.makedirs(out_dir)
+                    tt.split_file(path, out_dir, "long_S", "regex", pattern, overlap=overlap)
+                    chunks = []
+                    for name, _ in tt.scan_text_files(out_dir):
+                        with open(name, encoding="utf-8") as f:
+                            chunks.append(f.read())
+                    self.assertEqual(chunks == expected, same, overlap)
+
+    def test_byte_chunks_respect_cap(self):
+        rng = random.Random(4)
+        text = tt.TEXT_CLEANER.clean(sample_text(rng, 2000))
+        for a, b in tt.split_chunk_bounds(text, "bytes", "100", "gb18030"):
+            self.assertLessEqual(len(text[a:b].encode("gb18030")), 100)
+
+class EditedLinesTest(unittest.TestCase):
+    def test_iter_pieces_splices_unchanged_lines(self):
+        rng = random.Random(5)
+        words = ["第1章", "中文", "", "abc", "\U0001f600x"]
+        for enc in ("utf-8", "gb18030"):
+            for _ in range(200):
+                lines = [rng.choice(words) for _ in range(rng.randint(1, 30))]
+                original = "\n".join(lines).encode(enc)
+                edited = tt.EditedLines(len(lines))
+                for _ in range(rng.randint(0, 6)):
+                    line = rng.randrange(len(lines))
+                    removed = rng.randint(0, min(3, len(lines) - 1 - line))
+                    new = [rng.choice(words) + "*" for _ in range(rng.randint(1, 3))]
+                    lines[line:line + removed + 1] = new
+                    edited.edit(line, removed, len(new) - 1)
+                # 위젯처럼 first..last-1 줄, 마지막 줄이 아니면 줄바꿈 포함
+                get_lines = lambda a, b: "\n".join(lines[a:b]) + ("\n" if b < len(lines) else "")
+                pieces = edited.iter_pieces(original, get_lines)
+                data = b"".join(p.encode(enc) if isinstance(p, str) else bytes(p) for p in pieces)
+                self.assertEqual(data, "\n".join(lines).encode(enc))
+
+class TextBlockReaderTest(IsolatedCacheMixin, unittest.TestCase):
+    def test_ascii_head_does_not_decide_encoding(self):
+        head = "chapter line ascii only\n" * (tt.DETECT_SAMPLE_SIZE // 20)
+        for enc in ("utf-8", "gb18030"):
+            path = os.path.join(self.tmp.name, f"{enc}.txt")
+            with open(path, "wb") as f:
+                f.write((head + "\u201chello\u201d 第1章 中文内容，这是正文。\n" * 50).encode(enc))
+            expected, expected_enc = tt.read_text_with_autodetect(path, use_cache=False)
+            reader = tt.TextBlockReader(path, block_size=4096)
+            self.assertEqual(reader.encoding, expected_enc)
+            self.assertEqual("".join(reader), expected)
+            self.assertEqual(reader.fallbacks, [])
+
+class MergeTest(IsolatedCacheMixin, unittest.TestCase):
+    def write_book(self, name, enc="gb18030", chapters=30):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write("".join(f"第{i}章 标题\n中文内容\n" for i in range(1, chapters + 1)).encode(enc))
+        return path
+
+    def merged_bytes(self, files, out_dir, group_size=4, workers=1):
+        os.makedirs(out_dir)
+        outputs, enc, _, _ = tt.run_merge(files, out_dir, "book_M", group_size, workers)
+        data = []
+        for path in outputs:
+            with open(path, "rb") as f:
+                data.append(f.read())
+        return enc, data
+
+    def test_zip_members_merge_like_loose_chunks(self):
+        book = self.write_book("book.txt")
+        loose_dir = os.path.join(self.tmp.name, "loose")
+        os.makedirs(loose_dir)
+        tt.split_file(book, loose_dir, "book_S", "regex", tt.CHAPTER_PATTERN)
+        tt.split_file(book, self.tmp.name, "book_S", "regex", tt.CHAPTER_PATTERN, container="stored")
+        loose = [path for path, _ in tt.scan_text_files(loose_dir)]
+        members = tt.FileCollection()
+        members.add([os.path.join(self.tmp.name, "book_S.zip")])
+        self.assertEqual(len(members), len(loose))
+        expected = self.merged_bytes(loose, os.path.join(self.tmp.name, "out_loose"))
+        self.assertEqual(expected[0], "gb18030")
+        self.assertEqual(self.merged_bytes(members, os.path.join(self.tmp.name, "out_zip")), expected)
+
+    def test_zip_merge_with_worker_processes(self):
+        book = self.write_book("book.txt", chapters=200)
+        tt.split_file(book, self.tmp.name, "book_S", "regex", tt.CHAPTER_PATTERN, container="stored")
+        members = tt.FileCollection()
+        members.add([os.path.join(self.tmp.name, "book_S.zip")])  # 부모 프로세스에서 먼저 열어 풀 프로세스가 물려받게 함
+        expected = self.merged_bytes(members, os.path.join(self.tmp.name, "out_1"), 20, 1)
+        self.assertEqual(self.merged_bytes(members, os.path.join(self.tmp.name, "out_2"), 20, 2), expected)
+
+    def test_pause_stops_new_groups_with_workers(self):
+        files = [self.write_book(f"b_{i:07d}.txt", chapters=200) for i in range(1, 41)]
+        out_dir = os.path.join(self.tmp.name, "out")
+        os.makedirs(out_dir)
+        job = tt.Job("merge", None)
+        first_report = threading.Event()
+        def report(done, total, files=None):
+            first_report.set()
+            job.report(done, total, files)
+        worker = threading.Thread(target=lambda: self.assertRaises(
+            tt.JobCancelled, tt.run_merge, files, out_dir, "b_M", 1, 2, False, report, job.checkpoint))
+        worker.start()
+        first_report.wait(30)
+        job.pause()
+        time.sleep(0.5)  # 이미 풀에 들어간 묶음(최대 workers 개)이 끝날 시간
+        paused_count = len(os.listdir(out_dir))
+        time.sleep(0.5)
+        self.assertEqual(len(os.listdir(out_dir)), paused_count)
+        self.assertLess(paused_count, 10)
+        job.cancel()
+        worker.join(30)
+        self.assertFalse(worker.is_alive())
+        self.assertLess(len(os.listdir(out_dir)), 10)
+
+class ScanTest(IsolatedCacheMixin, unittest.TestCase):
+    def test_equal_natural_keys_fall_back_to_name(self):
+        names = ["b2.txt", "a1.txt", "a01.txt", "A1.txt", "a10.txt", "a001.txt"]
+        for name in names:
+            open(os.path.join(self.tmp.name, name), "w").close()
+        found = [os.path.basename(path) for path, _ in tt.scan_text_files(self.tmp.name)]
+        self.assertEqual(found, ["A1.txt", "a001.txt", "a01.txt", "a1.txt", "a10.txt", "b2.txt"])
+
+class CopyFileBytesTest(IsolatedCacheMixin, unittest.TestCase):
+    def test_fallback_after_partial_sendfile_resumes_at_offset(self):
+        src = os.path.join(self.tmp.name, "src.bin")
+        data = bytes(range(256)) * 64
+        with open(src, "wb") as f:
+            f.write(data)
+        real_sendfile, calls = getattr(os, "sendfile", None), []
+        def flaky_sendfile(out_fd, in_fd, offset, count):
+            calls.append(offset)
+            if len(calls) > 1: raise OSError("sendfile 실패")
+            if real_sendfile: return real_sendfile(out_fd, in_fd, offset, 1000)
+            os.write(out_fd, data[offset:offset + 1000])
+            return 1000
+        out_path = os.path.join(self.tmp.name, "out.bin")
+        with open(out_path, "wb") as out, mock.patch.object(os, "sendfile", flaky_sendfile, create=True):
+            out.write(b"head")
+            tt.copy_file_bytes(src, out)
+        with open(out_path, "rb") as f:
+            self.assertEqual(f.read(), b"head" + data)
+        self.assertEqual(calls, [0, 1000])
+
+class ChapterIndexTest(IsolatedCacheMixin, unittest.TestCase):
+    def test_split_continues_when_index_cannot_be_saved(self):
+        book = MergeTest.write_book(self, "book.txt")
+        expected_dir, out_dir = os.path.join(self.tmp.name, "expected"), os.path.join(self.tmp.name, "out")
+        os.makedirs(expected_dir)
+        os.makedirs(out_dir)
+        expected = tt.split_file(book, expected_dir, "book_S", "regex", tt.CHAPTER_PATTERN)
+        with mock.patch.object(tt.ChapterIndex, "save", side_effect=PermissionError("읽기 전용")):
+            count = tt.split_file(book, out_dir, "book_S", "regex", tt.CHAPTER_PATTERN, use_index=True)
+        self.assertEqual(count, expected)
+        self.assertEqual(sorted(os.listdir(out_dir)), sorted(os.listdir(expected_dir)))
+        self.assertFalse(os.path.exists(book + tt.CHAPTER_INDEX_SUFFIX))
+
+class SplitBatchTest(IsolatedCacheMixin, unittest.TestCase):
+    def test_rejects_books_sharing_an_output_folder(self):
+        files = [MergeTest.write_book(self, name) for name in ("book.txt", "book_0000001.txt")]
+        out_dir = os.path.join(self.tmp.name, "out")
+        os.makedirs(out_dir)
+        with self.assertRaises(ValueError):
+            tt.run_split_batch(files, out_dir, "regex", tt.CHAPTER_PATTERN, workers=2)
+        self.assertEqual(os.listdir(out_dir), [])
+
+class CliTest(IsolatedCacheMixin, unittest.TestCase):
+    write_book = MergeTest.write_book
+
+    def run_cli(self, *argv):
+        args = tt.cli_parser().parse_args(argv)
+        return tt.CLI_COMMANDS[args.command](args)
+
+    def test_split_rejects_inputs_with_the_same_output_folder(self):
+        first = self.write_book("book.txt")
+        os.makedirs(os.path.join(self.tmp.name, "other"))
+        second = os.path.join(self.tmp.name, "other", "book.txt")
+        os.replace(self.write_book("copy.txt"), second)
+        out_dir = os.path.join(self.tmp.name, "out")
+        with self.assertRaises(ValueError):
+            self.run_cli("split", first, second, "-o", out_dir)
+        self.assertFalse(os.path.exists(os.path.join(out_dir, "book_S")))
+
+    def test_only_merge_accepts_split_zips(self):
+        book = self.write_book("book.txt")
+        tt.split_file(book, self.tmp.name, "book_S", "regex", tt.CHAPTER_PATTERN, container="stored")
+        zip_path = os.path.join(self.tmp.name, "book_S.zip")
+        out_dir = os.path.join(self.tmp.name, "out")
+        for argv in (("split", zip_path), ("clean", zip_path, "-o", out_dir), ("detect", zip_path)):
+            with self.assertRaises(ValueError):
+                self.run_cli(*argv)
+            with self.assertRaises(ValueError):
+                self.run_cli(*argv[:1], tt.container_member_path(zip_path, "book_S_0000001.txt"), *argv[2:])
+        summary = self.run_cli("merge", zip_path, "-o", out_dir, "--name", "book_M", "--group", "10")
+        self.assertEqual(summary["files"], 30)
+        self.assertEqual(len(summary["outputs"]), 3)
+
+class FakeRoot:
+    def after(self, ms, func):
+        pass
+
+class ProgressChannelTest(unittest.TestCase):
+    def test_dialogs_from_worker_open_on_drain(self):
+        channel = tt.ProgressChannel(FakeRoot(), {}, mock.Mock())
+        with mock.patch.object(tt, "messagebox") as messagebox:
+            worker = threading.Thread(target=channel.dialog, args=("error", "오류", "실패"))
+            worker.start()
+            worker.join()
+            messagebox.showerror.assert_not_called()
+            channel._drain()
+        messagebox.showerror.assert_called_once_with("오류", "실패")
+
+class JobSchedulerTest(unittest.TestCase):
+    def test_cancel_all_wakes_paused_jobs(self):
+        scheduler = tt.JobScheduler(workers=1)
+        started = threading.Event()
+        def work(job):
+            started.set()
+            while True: job.report(0, 1)
+        job = scheduler.submit("loop", work)
+        waiting = scheduler.submit("waiting", work)
+        started.wait(10)
+        job.pause()
+        scheduler.cancel_all()
+        scheduler.join()
+        self.assertEqual((job.state, waiting.state), (tt.Job.CANCELLED, tt.Job.CANCELLED))
+        self.assertEqual(scheduler.active(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,32 +1,2051 @@
-import tkinter as tk
-from tkinter import filedialog, messagebox, ttk, simpledialog
+try:
+    import tkinter as tk
+    from tkinter import filedialog, messagebox, ttk, simpledialog, scrolledtext
+except ImportError:  # tkinter 가 없는 서버 등: 명령줄 모드(cli_main)만 사용
+    tk = ttk = None
+import argparse
 import re
 import chardet
+import codecs
+import hashlib
+import io
 import os
+import queue
+import json
+import mmap
+import shutil
+import statistics
+import struct
+import sys
 import threading
-from tkinter import scrolledtext
+import time
+import zipfile
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from array import array
+from itertools import islice
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+try:
+    import numpy as np  # 선택 사항: 큰 파일 정제 가속
+except ImportError:
+    np = None
 
 # ---------- 유틸리티 (인코딩 감지 및 공백 치환) ----------
 
-def read_text_with_autodetect(file_path):
+DETECT_SAMPLE_SIZE = 64 * 1024  # chardet 및 후보 검사에 쓰는 앞부분 샘플 크기
+ENCODING_FALLBACKS = ("gb18030", None, "utf-8", "cp949")  # None 자리는 chardet 추정값
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),  # UTF-16 LE BOM과 앞부분이 같으므로 먼저 검사
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+def _sample_decodes(sample, enc, complete):
+    # 샘플이 파일 중간에서 잘렸으면 끝의 미완성 바이트는 오류로 보지 않음
+    try:
+        codecs.getincrementaldecoder(enc)(errors="strict").decode(sample, final=complete)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+def guess_encoding(sample):
+    return chardet.detect(sample)["encoding"]
+
+def iter_encoding_candidates(sample, complete=False):
+    # 샘플 디코딩에 실패한 후보는 전체 디코딩도 실패하므로 건너뜀 (시도 순서는 그대로)
+    for bom, enc in _BOM_ENCODINGS:
+        if sample.startswith(bom):
+            yield enc
+            return
+    utf8_ok = _sample_decodes(sample, "utf-8", complete)
+    tried = set()
+    for e in ENCODING_FALLBACKS:
+        if e is None:
+            if utf8_ok: continue  # 유효한 UTF-8이면 chardet 생략
+            e = guess_encoding(sample)
+        if not e or e.lower() in tried: continue
+        tried.add(e.lower())
+        if _sample_decodes(sample, e, complete):
+            yield e
+
+def _decode_strict(raw, enc):
+    if enc == "gb18030" and raw.isascii():
+        return raw.decode("ascii")  # ASCII는 gb18030과 결과가 같고 훨씬 빠름
+    return raw.decode(enc, errors="strict")
+
+ENCODING_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".text_tool_encoding_cache.json")
+ENCODING_CACHE_MAX = 20000
+
+class EncodingCache:
+    # (경로, 크기, 수정시각) -> 감지된 인코딩 (+ 정제 불필요 확인 표시), 오래 안 쓴 항목부터 제거 (LRU)
+    def __init__(self, path=ENCODING_CACHE_PATH, max_entries=ENCODING_CACHE_MAX):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+
+    def _load(self):
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            for key, entry in data.items():
+                size, mtime_ns, enc = entry[:3]
+                self._entries[key] = (size, mtime_ns, enc, entry[3] if len(entry) > 3 else None)
+        except (OSError, ValueError, TypeError):
+            self._entries.clear()
+
+    def _lookup(self, file_path, st=None):
+        try:
+            st = st or os.stat(file_path)
+        except OSError:
+            return None
+        key = os.path.abspath(file_path)
+        with self._lock:
+            if not self._loaded: self._load()
+            entry = self._entries.get(key)
+            if not entry or entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+                return None
+            self._entries.move_to_end(key)
+            self._dirty = True
+            return entry
+
+    def get(self, file_path, st=None):
+        entry = self._lookup(file_path, st)
+        return entry[2] if entry else None
+
+    def get_clean_mark(self, file_path, st=None):
+        # 이 파일이 어떤 정제 규칙에서 정제할 글자가 없다고 확인되었는지 (TextCleaner.signature)
+        entry = self._lookup(file_path, st)
+        return entry[3] if entry else None
+
+    def put(self, file_path, enc, st=None, clean_mark=None):
+        try:
+            st = st or os.stat(file_path)
+        except OSError:
+            return
+        key = os.path.abspath(file_path)
+        with self._lock:
+            if not self._loaded: self._load()
+            self._entries[key] = (st.st_size, st.st_mtime_ns, enc, clean_mark)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def export(self, file_paths):
+        # 다른 프로세스에서 감지한 결과를 부모 프로세스 캐시로 넘길 때 사용
+        with self._lock:
+            keys = (os.path.abspath(p) for p in file_paths)
+            return [(k, self._entries[k]) for k in keys if k in self._entries]
+
+    def update(self, items):
+        with self._lock:
+            if not self._loaded: self._load()
+            for key, entry in items:
+                self._entries[key] = tuple(entry)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty: return
+            data = dict(self._entries)
+            self._dirty = False
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+ENCODING_CACHE = EncodingCache()
+
+def detect_file_encoding(file_path):
+    # 캐시에 있으면 파일을 읽지 않고 바로 반환. ZIP 안의 조각은 조각 바이트로 감지 (캐시는 파일 단위라 쓰지 않음)
+    if is_container_member(file_path):
+        return decode_with_autodetect(read_container_bytes(file_path))[1]
+    enc = ENCODING_CACHE.get(file_path)
+    if enc: return enc
+    return read_text_with_autodetect(file_path)[1]
+
+def _decode_with_autodetect(raw, sample_size=DETECT_SAMPLE_SIZE):
+    # 반환값: (텍스트, 인코딩, 엄격 디코딩 성공 여부)
+    if sample_size is None or len(raw) <= sample_size:
+        sample, complete = raw, True
+    else:
+        sample, complete = raw[:sample_size], False
+    for e in iter_encoding_candidates(sample, complete):
+        try:
+            return _decode_strict(raw, e), e, True
+        except (UnicodeDecodeError, LookupError):
+            continue
+    final_enc = guess_encoding(sample) or "utf-8"
+    try:
+        content = raw.decode(final_enc, errors="replace")
+    except LookupError:
+        final_enc = "utf-8"
+        content = raw.decode(final_enc, errors="replace")
+    return content, final_enc, False
+
+def decode_with_autodetect(raw, sample_size=DETECT_SAMPLE_SIZE):
+    return _decode_with_autodetect(raw, sample_size)[:2]
+
+def read_text_with_autodetect(file_path, sample_size=DETECT_SAMPLE_SIZE, use_cache=True):
+    # sample_size=None 이면 예전처럼 파일 전체로 감지
     try:
         with open(file_path, "rb") as f:
+            st = os.fstat(f.fileno())
             raw = f.read()
-        detected = chardet.detect(raw)
-        enc_candidate = detected["encoding"]
-        for e in ["gb18030", enc_candidate, "utf-8", "cp949"]:
-            if not e: continue
+        cached = ENCODING_CACHE.get(file_path, st) if use_cache else None
+        if cached:
             try:
-                content = raw.decode(e, errors="strict")
-                return content, e
+                return _decode_strict(raw, cached), cached
             except (UnicodeDecodeError, LookupError):
-                continue
-        final_enc = enc_candidate if enc_candidate else "utf-8"
-        content = raw.decode(final_enc, errors="replace")
-        return content, final_enc
+                pass
+        content, enc, strict = _decode_with_autodetect(raw, sample_size)
+        if strict and use_cache: ENCODING_CACHE.put(file_path, enc, st)
+        return content, enc
     except Exception as e:
         return f"파일 읽기 오류: {str(e)}", "utf-8"
 
+# ---------- 텍스트 정제 ----------
+
+# 저장 직전 정제 규칙: (정규식 문자 클래스 내용, 치환 문자). 줄바꿈 \n, \r 및 탭 \t은 보존
+DEFAULT_CLEAN_RULES = (
+    ("\ufffd", " "),                                # 블랙 다이아몬드
+    (r"\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f", " "),   # 보이지 않는 제어 문자
+    (r"\uE000-\uF8FF\uD800-\uDFFF", " "),            # 사용자 정의 영역, 서로게이트
+    ("\u3000\ufeff\xa0\u200b\u200c\u200d", " "),     # 전각/특수 공백
+)
+
+NUMPY_CLEAN_THRESHOLD = 8 * 1024 * 1024  # 이 글자 수 이상일 때 NumPy 백엔드 검토
+NUMPY_CLEAN_DENSITY = 0.02  # 치환 비율이 이보다 낮으면 정규식이 더 빠름
+NUMPY_CLEAN_SAMPLE = 1024 * 1024
+NUMPY_CLEAN_CHUNK = 16 * 1024 * 1024
+
+class TextCleaner:
+    # 모든 규칙을 정규식 하나로 묶어 텍스트를 한 번만 훑음 (겹치는 글자는 앞 규칙 우선)
+    # backend: "auto" (큰 텍스트는 NumPy 사용 가능 시 자동 선택), "python", "numpy"
+    def __init__(self, rules=DEFAULT_CLEAN_RULES, backend="auto"):
+        self.rules = tuple(rules)
+        self.backend = backend
+        self.signature = hashlib.md5(repr(self.rules).encode("utf-8", "surrogatepass")).hexdigest()
+        self._luts = None
+        replacements = [r for _, r in self.rules]
+        # 코드 포인트 표로 바꿔 치기하려면 모든 치환값이 한 글자여야 함
+        self.single_char = all(len(r) == 1 for r in replacements)  # 글자 수가 바뀌지 않는 규칙인지
+        self.numpy_ok = np is not None and bool(self.rules) and self.single_char
+        if not self.rules:
+            self.pattern = None
+        elif len(set(replacements)) == 1:
+            self.pattern = re.compile("[" + "".join(c for c, _ in self.rules) + "]")
+            self._repl = replacements[0].replace("\\", "\\\\")
+        else:
+            self.pattern = re.compile("|".join(f"([{c}])" for c, _ in self.rules))
+            self._repl = lambda m: replacements[m.lastindex - 1]
+
+    def clean(self, text):
+        if not text: return ""
+        if self.pattern is None: return text
+        if self._use_numpy(len(text), text):
+            return self._clean_numpy(text)
+        return self._clean_regex(text)
+
+    def _clean_regex(self, text):
+        return self.pattern.sub(self._repl, text) if text else ""
+
+    def _use_numpy(self, size, sample):
+        # size: 전체 크기 (글자 수, 스트림이면 파일 바이트 수), sample: 치환 비율을 잴 앞부분
+        if not self.numpy_ok or self.backend == "python": return False
+        if self.backend == "numpy": return True
+        if size < NUMPY_CLEAN_THRESHOLD: return False
+        sample = sample[:NUMPY_CLEAN_SAMPLE]
+        hits = sum(1 for _ in self.pattern.finditer(sample))
+        return hits >= len(sample) * NUMPY_CLEAN_DENSITY
+
+    def _numpy_luts(self):
+        # 전체 코드 포인트 -> 치환 결과 표 (BMP 전용 uint16 표 포함), 처음 한 번만 생성
+        if self._luts is None:
+            every_char = "".join(map(chr, range(0x110000)))
+            cleaned = self.pattern.sub(self._repl, every_char).encode("utf-32-le", "surrogatepass")
+            lut32 = np.frombuffer(cleaned, dtype=np.uint32)
+            self._luts = (lut32, lut32[:0x10000].astype(np.uint16))
+        return self._luts
+
+    def _clean_numpy(self, text):
+        lut32, lut16 = self._numpy_luts()
+        parts = []
+        for i in range(0, len(text), NUMPY_CLEAN_CHUNK):
+            piece = text[i:i + NUMPY_CLEAN_CHUNK]
+            raw = piece.encode("utf-16-le", "surrogatepass")
+            if len(raw) == 2 * len(piece):  # BMP 글자만 있으면 2바이트 표로 처리
+                codes = lut16[np.frombuffer(raw, dtype=np.uint16)]
+                parts.append(codes.tobytes().decode("utf-16-le", "surrogatepass"))
+            else:
+                codes = lut32[np.frombuffer(piece.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)]
+                parts.append(codes.tobytes().decode("utf-32-le", "surrogatepass"))
+        return "".join(parts)
+
+    __call__ = clean
+
+    def iter_clean(self, blocks, size=None):
+        # 블록 끝의 \r 이나 상위 서로게이트는 다음 블록 앞에 붙여 내보냄 (\r\n, 서로게이트 쌍이 갈라지지 않도록)
+        # 백엔드는 블록마다가 아니라 스트림 전체 크기(size, 없으면 TextBlockReader.size)와 첫 블록의 치환 비율로 한 번만 정함
+        if size is None: size = getattr(blocks, "size", None)
+        clean = self.clean if size is None else None
+        carry = ""
+        for block in blocks:
+            if carry:
+                block, carry = carry + block, ""
+            if not block: continue
+            cut = len(block)
+            while cut and (block[cut - 1] == "\r" or "\ud800" <= block[cut - 1] <= "\udbff"):
+                cut -= 1
+            if cut < len(block):
+                block, carry = block[:cut], block[cut:]
+            if not block: continue
+            if clean is None: clean = self._stream_clean(size, block)
+            yield clean(block)
+        if carry: yield (clean or self.clean)(carry)
+
+    def _stream_clean(self, size, sample):
+        if self.pattern is None: return lambda text: text
+        return self._clean_numpy if self._use_numpy(size, sample) else self._clean_regex
+
+TEXT_CLEANER = TextCleaner()
+
+# ---------- 스트리밍 읽기 (블록 단위 디코딩) ----------
+
+STREAM_BLOCK_SIZE = 1024 * 1024
+_NON_ASCII = re.compile(rb"[\x80-\xff]")
+
+class TextBlockReader:
+    # 앞부분 샘플로 인코딩을 정하고, 파일 전체를 메모리에 올리지 않고 텍스트 블록을 차례로 돌려줌
+    def __init__(self, file_path, block_size=STREAM_BLOCK_SIZE, sample_size=DETECT_SAMPLE_SIZE):
+        self.file_path = file_path
+        self.block_size = block_size
+        self.sample_size = sample_size
+        self.size = os.path.getsize(file_path)
+        self.fallbacks = []  # 중간에 인코딩을 바꾸거나 깨진 바이트를 치환한 위치: (바이트 오프셋, 인코딩)
+        self.position = 0  # 지금까지 읽은 바이트 수 (진행률 표시용)
+        self.from_cache = False
+        self.encoding = ENCODING_CACHE.get(file_path)
+        if self.encoding:
+            self.from_cache = True
+        else:
+            with open(file_path, "rb") as f:
+                sample, complete = self._sample_at(f, 0)
+                if sample.isascii() and not complete:
+                    # 앞부분이 ASCII 뿐이면 어떤 후보로도 읽히므로 정하지 않고, 처음 나오는 비 ASCII 바이트부터 다시 샘플
+                    start = self._find_non_ascii(f, len(sample))
+                    if start is not None: sample, complete = self._sample_at(f, start)
+            self.encoding = self._pick_encoding(sample, complete)
+
+    def _find_non_ascii(self, f, pos):
+        f.seek(pos)
+        while True:
+            block = f.read(self.block_size)
+            if not block: return None
+            if not block.isascii():
+                return pos + _NON_ASCII.search(block).start()
+            pos += len(block)
+
+    def _pick_encoding(self, sample, complete):
+        for e in iter_encoding_candidates(sample, complete):
+            return e
+        return guess_encoding(sample) or "utf-8"
+
+    def _sample_at(self, f, pos):
+        f.seek(pos)
+        sample = f.read(self.sample_size)
+        return sample, pos + len(sample) >= self.size
+
+    def _recover(self, f, enc, err_pos, err_end):
+        # 깨진 바이트는 치환하고, 그 뒤가 같은 인코딩으로 읽히지 않으면 인코딩을 다시 고름
+        sample, complete = self._sample_at(f, err_end)
+        if not _sample_decodes(sample, enc, complete):
+            enc = self._pick_encoding(sample, complete)
+        self.fallbacks.append((err_pos, enc))
+        return enc, err_end
+
+    def __iter__(self):
+        enc = self.encoding
+        decoder = codecs.getincrementaldecoder(enc)(errors="strict")
+        with open(self.file_path, "rb") as f:
+            pos = 0
+            while True:
+                f.seek(pos)
+                block = f.read(self.block_size)
+                final = not block
+                pending = len(decoder.getstate()[0])
+                try:
+                    text = decoder.decode(block, final=final)
+                except UnicodeDecodeError as e:
+                    base = pos - pending
+                    head = codecs.decode(e.object[:e.start], enc)
+                    if head: yield head
+                    enc, pos = self._recover(f, enc, base + e.start, base + e.end)
+                    yield "\ufffd"
+                    decoder = codecs.getincrementaldecoder(enc)(errors="strict")
+                    continue
+                pos += len(block)
+                self.position = pos
+                if text: yield text
+                if final: break
+        if not self.fallbacks and not self.from_cache:
+            ENCODING_CACHE.put(self.file_path, self.encoding)
+
+# ---------- 병합 파일 목록 ----------
+
+_DIGIT_RUNS = re.compile(r'(\d+)')
+
+def natural_sort_key(name):
+    # "ch2" < "ch10" 처럼 숫자 부분은 숫자로 비교 (문자열/숫자가 번갈아 나오므로 튜플끼리 비교 가능)
+    parts = _DIGIT_RUNS.split(name.lower())
+    parts[1::2] = [int(p) for p in parts[1::2]]
+    return tuple(parts)
+
+def scan_text_files(folder, ext=".txt"):
+    # os.scandir 로 한 번에 훑으며 크기/수정시각도 함께 얻고 자연 정렬한 [(경로, (크기, 수정시각))]
+    found = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if not entry.name.lower().endswith(ext): continue
+            try:
+                if not entry.is_file(): continue
+                st = entry.stat()
+            except OSError:
+                continue
+            found.append((entry.path, (st.st_size, st.st_mtime_ns)))
+    # 자연 정렬 키가 같은 이름("a01", "a1")은 원래 이름으로 순서를 정해 실행마다 같게
+    found.sort(key=lambda item: (natural_sort_key(os.path.basename(item[0])), os.path.basename(item[0])))
+    return found
+
+class FileCollection:
+    # 순서를 유지하는 파일 목록 + 중복 검사용 집합 (수만 개를 넣어도 O(n))
+    def __init__(self):
+        self.paths = []
+        self.names = []
+        self.stats = {}  # 경로 -> (크기, 수정시각), 폴더에서 읽은 경우만
+        self._seen = set()
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __getitem__(self, index):
+        return self.paths[index]
+
+    def __contains__(self, path):
+        return path in self._seen
+
+    def add(self, paths, stats=None):
+        added = 0
+        for path in expand_containers(paths):
+            if path in self._seen: continue
+            self._seen.add(path)
+            self.paths.append(path)
+            self.names.append(os.path.basename(path))
+            if stats and path in stats: self.stats[path] = stats[path]
+            added += 1
+        return added
+
+    def add_folder(self, folder, ext=".txt"):
+        found = scan_text_files(folder, ext)
+        return self.add((path for path, _ in found), dict(found))
+
+    def remove_indices(self, indices):
+        drop = set(indices)
+        for i in drop:
+            self._seen.discard(self.paths[i])
+            self.stats.pop(self.paths[i], None)
+        keep = [i for i in range(len(self.paths)) if i not in drop]
+        self.paths = [self.paths[i] for i in keep]
+        self.names = [self.names[i] for i in keep]
+
+    def display(self, index):
+        return self.names[index]
+
+    def total_size(self):
+        # 진행 속도(MB/s) 계산용. 폴더에서 읽을 때 얻은 크기가 있으면 다시 stat 하지 않음
+        total = 0
+        for path in self.paths:
+            st = self.stats.get(path)
+            if st:
+                total += st[0]
+                continue
+            try:
+                total += input_size(path)
+            except (OSError, KeyError, zipfile.BadZipFile):
+                pass
+        return total
+
+# ---------- 병합 ----------
+
+# 디코딩 후 다시 인코딩해도 원래 바이트와 같은 인코딩 (원본 그대로 복사 가능)
+COPY_SAFE_ENCODINGS = {"utf-8", "gb18030", "ascii"}
+
+def _codec_name(enc):
+    try:
+        return codecs.lookup(enc).name
+    except LookupError:
+        return None
+
+def needs_rewrite(reader, out_enc, cleaner=TEXT_CLEANER):
+    # 출력 인코딩과 같고 정제할 글자가 하나도 없으면 False (디코딩 + 검색만 하고 치환/인코딩은 생략)
+    enc = _codec_name(reader.encoding)
+    if enc not in COPY_SAFE_ENCODINGS or enc != _codec_name(out_enc):
+        return True
+    if reader.from_cache and ENCODING_CACHE.get_clean_mark(reader.file_path) == cleaner.signature:
+        return False
+    decoder = codecs.getincrementaldecoder(enc)(errors="strict")
+    with open(reader.file_path, "rb") as f:
+        st = os.fstat(f.fileno())
+        while True:
+            block = f.read(reader.block_size)
+            try:
+                text = decoder.decode(block, final=not block)
+            except UnicodeDecodeError:
+                return True
+            if cleaner.pattern is not None and cleaner.pattern.search(text):
+                return True
+            if not block: break
+    ENCODING_CACHE.put(reader.file_path, reader.encoding, st, cleaner.signature)
+    return False
+
+def copy_file_bytes(src_path, out):
+    # 가능하면 os.sendfile 로 커널 안에서 바로 복사
+    out.flush()
+    with open(src_path, "rb") as src:
+        offset = 0
+        try:
+            size = os.fstat(src.fileno()).st_size
+            while offset < size:
+                sent = os.sendfile(out.fileno(), src.fileno(), offset, size - offset)
+                if sent == 0: break
+                offset += sent
+            out.seek(0, os.SEEK_END)
+            return
+        except (AttributeError, OSError):
+            # sendfile 이 중간에 실패하면 이미 보낸 offset 바이트 뒤부터 이어서 복사
+            src.seek(offset)
+            out.seek(0, os.SEEK_END)
+        shutil.copyfileobj(src, out)
+
+def merge_file_into(out, encoder, f_path, out_enc, cleaner=TEXT_CLEANER):
+    # out 은 바이너리 파일, encoder 는 출력 인코딩의 증분 인코더. 원본을 그대로 복사했으면 True
+    try:
+        if is_container_member(f_path):
+            out.write(encoder.encode(read_container_member(f_path, cleaner)))
+            return False
+        reader = TextBlockReader(f_path)
+        if not needs_rewrite(reader, out_enc, cleaner):
+            copy_file_bytes(f_path, out)
+            return True
+        for block in cleaner.iter_clean(reader):
+            out.write(encoder.encode(block))
+    except OSError as e:
+        out.write(encoder.encode(f"파일 읽기 오류: {str(e)}"))
+    return False
+
+def merge_file_num(path):
+    match = re.search(r'(\d+)\.txt$', path)
+    return f"{int(match.group(1)):04d}" if match else "0000"
+
+def merge_output_base(first_path):
+    # "책_0000001.txt" (ZIP 안의 조각이면 조각 이름) -> "책_M" (병합 탭의 기본 저장 파일명과 같은 규칙)
+    name = os.path.splitext(os.path.basename(first_path.rpartition(ZIP_MEMBER_SEP)[2]))[0]
+    clean_name = re.sub(r'_\d{7,}$', '', name)
+    return f"{clean_name}_M"
+
+def merge_output_name(output_base, group):
+    return f"{output_base}_{merge_file_num(group[0])}-{merge_file_num(group[-1])}.txt"
+
+MERGE_PREFETCH = 4  # 미리 읽어 둘 파일 수 (메모리 상한)
+MERGE_PREFETCH_MAX_BYTES = 32 * 1024 * 1024  # 이보다 큰 파일은 미리 읽지 않고 쓰기 단계에서 스트리밍
+
+def _prepare_merge_file(f_path, out_enc, cleaner=TEXT_CLEANER):
+    # 원본 그대로 복사할 파일이면 None, 아니면 정제된 텍스트 블록 목록
+    try:
+        if is_container_member(f_path):
+            return [read_container_member(f_path, cleaner)]
+        reader = TextBlockReader(f_path)
+        if not needs_rewrite(reader, out_enc, cleaner):
+            return None
+        return list(cleaner.iter_clean(reader))
+    except OSError as e:
+        return [f"파일 읽기 오류: {str(e)}"]
+
+def _prefetch_merge_file(pool, f_path, out_enc):
+    try:
+        if input_size(f_path) > MERGE_PREFETCH_MAX_BYTES: return None
+    except (OSError, KeyError, zipfile.BadZipFile):
+        pass
+    return pool.submit(_prepare_merge_file, f_path, out_enc)
+
+def merge_group(output_path, group, out_enc, on_file=None, prefetch=MERGE_PREFETCH):
+    # 묶음 하나를 파일 하나로 병합. 프로세스 풀에서도 돌 수 있도록 모듈 함수로 둠
+    # 스레드들이 다음 파일들을 미리 읽고 정제하는 동안, 이 스레드는 원래 순서대로 씀
+    encoder = codecs.getincrementalencoder(out_enc)(errors="replace")
+    with open(output_path, "wb") as out, ThreadPoolExecutor(max_workers=max(1, prefetch)) as pool:
+        paths = iter(group)
+        window = deque((f_path, _prefetch_merge_file(pool, f_path, out_enc)) for f_path in islice(paths, max(0, prefetch)))
+        while window:
+            f_path, future = window.popleft()
+            next_path = next(paths, None)
+            if next_path is not None:
+                window.append((next_path, _prefetch_merge_file(pool, next_path, out_enc)))
+            if future is None:
+                merge_file_into(out, encoder, f_path, out_enc)
+            else:
+                blocks = future.result()
+                if blocks is None:
+                    copy_file_bytes(f_path, out)
+                else:
+                    for block in blocks:
+                        out.write(encoder.encode(block))
+            out.write(encoder.encode("\n"))
+            if on_file: on_file()
+        for f_path in paths:  # prefetch=0 이면 순서대로 하나씩
+            merge_file_into(out, encoder, f_path, out_enc)
+            out.write(encoder.encode("\n"))
+            if on_file: on_file()
+        out.write(encoder.encode("", final=True))
+    return len(group), ENCODING_CACHE.export(group)
+
+def _merge_executor(workers):
+    # 프로세스 풀을 못 쓰는 환경(Android 등)에서는 스레드 풀로 대체
+    try:
+        return ProcessPoolExecutor(max_workers=workers)
+    except (ImportError, OSError, NotImplementedError):
+        return ThreadPoolExecutor(max_workers=workers)
+
+def iter_pool_results(executor, tasks, workers, checkpoint=None):
+    # tasks: (키, 함수, 인자...) 순서열. 풀에는 한 번에 workers 개까지만 넣고, 새로 넣기 전마다 checkpoint() 를 부름
+    # (작업이 일시정지면 거기서 기다리고 취소면 예외가 나므로, 이미 돌고 있는 것만 끝나고 멈춤)
+    # 끝나는 대로 (키, 결과). 중간에 빠져나가면 아직 시작 안 한 것은 취소
+    tasks, pending = iter(tasks), {}
+    try:
+        while True:
+            for task in tasks:
+                if checkpoint: checkpoint()
+                key, func, *args = task
+                pending[executor.submit(func, *args)] = key
+                if len(pending) >= workers: break
+            if not pending: return
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    finally:
+        for future in pending: future.cancel()
+
+def run_file_batch(func, files, args=(), workers=1, on_progress=None, checkpoint=None):
+    # 입력 파일마다 func(경로, *args) 를 실행 (workers > 1 이면 프로세스 풀, 큰 파일부터 나눠 줌)
+    # func 는 풀에서 돌도록 모듈 함수로 두고, 마지막 반환값으로 인코딩 캐시 항목을 돌려줌 (부모 캐시에 합침)
+    # on_progress(끝난 파일 수, 전체 파일 수), checkpoint: 파일을 새로 시작하기 전마다 부름 (Job.checkpoint)
+    # 반환값: 입력 순서대로 func 반환값에서 캐시 항목을 뺀 튜플
+    results = {}
+    def file_done(path, result):
+        ENCODING_CACHE.update(result[-1])
+        results[path] = result[:-1]
+        if on_progress: on_progress(len(results), len(files))
+    if workers <= 1 or len(files) <= 1:
+        for path in files:
+            if checkpoint: checkpoint()
+            file_done(path, func(path, *args))
+    else:
+        # 큰 파일부터 나눠 줘야 마지막에 큰 파일 하나만 남아 기다리는 일이 줄어듦
+        order = sorted(files, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0, reverse=True)
+        with _merge_executor(workers) as executor:
+            for path, result in iter_pool_results(executor, ((path, func, path, *args) for path in order), workers, checkpoint):
+                file_done(path, result)
+    return [results[path] for path in files]
+
+def file_hash(file_path, block_size=STREAM_BLOCK_SIZE):
+    h = hashlib.blake2b(digest_size=16)
+    if is_container_member(file_path):
+        h.update(read_container_bytes(file_path))
+        return h.hexdigest()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            h.update(block)
+    return h.hexdigest()
+
+class MergeManifest:
+    # 결과 파일별로 입력 파일의 (경로, 크기, 수정시각, 해시)를 기록해 두고,
+    # 다시 실행하면 입력이 바뀐 묶음만 새로 만듦. 묶음이 끝날 때마다 기록하므로 중단 후 이어하기도 됨
+    SAVE_INTERVAL = 2.0
+
+    def __init__(self, path, out_enc, cleaner=TEXT_CLEANER):
+        self.path = path
+        self.header = {"version": 1, "encoding": _codec_name(out_enc), "cleaner": cleaner.signature}
+        self.groups = {}
+        self._last_save = time.monotonic()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if all(data.get(k) == v for k, v in self.header.items()):
+                self.groups = data.get("groups", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def is_current(self, output_path, group):
+        entry = self.groups.get(os.path.basename(output_path))
+        if not entry or [i[0] for i in entry["inputs"]] != list(group):
+            return False
+        try:
+            st = os.stat(output_path)
+            if [st.st_size, st.st_mtime_ns] != entry["output"]:
+                return False
+            for item in entry["inputs"]:
+                st = input_stat(item[0])
+                if st.st_size != item[1]: return False
+                if st.st_mtime_ns != item[2]:
+                    # 수정시각만 바뀐 경우는 내용 해시로 확인
+                    if file_hash(item[0]) != item[3]: return False
+                    item[2] = st.st_mtime_ns
+        except (OSError, KeyError, zipfile.BadZipFile):
+            return False
+        return True
+
+    def record(self, output_path, group):
+        name = os.path.basename(output_path)
+        old = {i[0]: i for i in self.groups.get(name, {}).get("inputs", [])}
+        inputs = []
+        for f_path in group:
+            st = input_stat(f_path)
+            prev = old.get(f_path)
+            if prev and prev[1] == st.st_size and prev[2] == st.st_mtime_ns:
+                digest = prev[3]
+            else:
+                digest = file_hash(f_path)
+            inputs.append([f_path, st.st_size, st.st_mtime_ns, digest])
+        st = os.stat(output_path)
+        self.groups[name] = {"inputs": inputs, "output": [st.st_size, st.st_mtime_ns]}
+        if time.monotonic() - self._last_save >= self.SAVE_INTERVAL:
+            self.save()
+
+    def save(self):
+        self._last_save = time.monotonic()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(dict(self.header, groups=self.groups), f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def run_merge_groups(jobs, out_enc, workers=1, on_progress=None, manifest=None, checkpoint=None):
+    # jobs: [(출력 경로, 입력 파일 목록)], on_progress(처리한 파일 수, 전체 파일 수)
+    # checkpoint: 묶음을 새로 시작하기 전마다 부름 (Job.checkpoint: 일시정지/취소)
+    # manifest 가 있으면 입력이 바뀌지 않은 묶음은 건너뜀. 반환값: (새로 만든 묶음 수, 건너뛴 묶음 수)
+    total = sum(len(group) for _, group in jobs)
+    if manifest is not None:
+        todo = [job for job in jobs if not manifest.is_current(*job)]
+    else:
+        todo = jobs
+    done = total - sum(len(group) for _, group in todo)
+    if on_progress and done: on_progress(done, total)
+    def file_done():
+        nonlocal done
+        done += 1
+        if on_progress: on_progress(done, total)
+    try:
+        if workers <= 1 or len(todo) <= 1:
+            for output_path, group in todo:
+                if checkpoint: checkpoint()
+                merge_group(output_path, group, out_enc, file_done)
+                if manifest is not None: manifest.record(output_path, group)
+        else:
+            with _merge_executor(workers) as executor:
+                tasks = (((output_path, group), merge_group, output_path, group, out_enc) for output_path, group in todo)
+                for job, (count, cache_items) in iter_pool_results(executor, tasks, workers, checkpoint):
+                    ENCODING_CACHE.update(cache_items)
+                    if manifest is not None: manifest.record(*job)
+                    done += count
+                    if on_progress: on_progress(done, total)
+    finally:
+        if manifest is not None: manifest.save()
+    return len(todo), len(jobs) - len(todo)
+
+def run_merge(files, save_dir, output_base=None, group_size=5, workers=1, incremental=False, on_progress=None, checkpoint=None):
+    # 병합 탭의 "병합 시작" 과 명령줄 merge 가 함께 쓰는 본체. files 는 순서대로인 입력 목록 (FileCollection 또는 list)
+    # group_size 개씩 묶어 "{output_base}_{처음}-{끝}.txt" 로 씀. 출력 인코딩은 첫 파일의 인코딩
+    # 반환값: (출력 경로 목록, 인코딩, 새로 만든 묶음 수, 건너뛴 묶음 수)
+    if not files: return [], None, 0, 0
+    output_base = output_base or merge_output_base(files[0])
+    first_enc = detect_file_encoding(files[0])
+    jobs = [(os.path.join(save_dir, merge_output_name(output_base, files[i:i + group_size])), files[i:i + group_size])
+            for i in range(0, len(files), group_size)]
+    manifest = None
+    if incremental:
+        manifest = MergeManifest(os.path.join(save_dir, f"{output_base}_manifest.json"), first_enc)
+    built, skipped = run_merge_groups(jobs, first_enc, workers, on_progress, manifest, checkpoint)
+    return [path for path, _ in jobs], first_enc, built, skipped
+
+# ---------- 분할 ----------
+
+# 맨 앞의 \b 뒤에 오는 고정 글자들 (메타 문자 전까지)
+CHAPTER_PATTERN = r"\b第\d+章\b"  # 분할 탭 기본 기준값, 편집기 목차
+
+_LEADING_BOUNDARY = re.compile(r'\\b([^\\.^$*+?{}\[\]|()]+)')
+
+def compile_split_pattern(pattern):
+    # 패턴이 \b 로 시작하면 re 가 고정 접두어("第")로 후보 위치를 건너뛰지 못해 모든 위치에서 패턴을 시도함
+    # (대용량에서 수십 배 느림). "\b第\d+章" 를 같은 위치에 맞는 "第(?<=\b第)\d+章" 로 바꿔 접두어 검색을 살림
+    if not isinstance(pattern, str): return pattern
+    m = _LEADING_BOUNDARY.match(pattern)
+    if m:
+        literal, rest = m.group(1), pattern[m.end():]
+        if rest[:1] in ("*", "+", "?", "{"):  # 마지막 글자에 붙은 반복은 그 글자와 함께 뒤에 남김
+            literal, rest = literal[:-1], literal[-1:] + rest
+        if literal:
+            try:
+                return re.compile(f"{literal}(?<=\\b{literal}){rest}")
+            except re.error:
+                pass
+    return re.compile(pattern)
+
+def regex_chunk_bounds(text, pattern):
+    # 패턴이 맞는 위치마다 새 조각 시작: [(시작, 끝)] (빈 조각 제외). 정규식은 한 번만 컴파일, 본문은 한 번만 훑음
+    pattern = compile_split_pattern(pattern)
+    edges = [0]
+    edges.extend(m.start() for m in pattern.finditer(text))
+    edges.append(len(text))
+    return [(a, b) for a, b in zip(edges, edges[1:]) if b > a]
+
+def split_chunk_bounds(text, mode, val, enc="utf-8"):
+    if mode == "regex":
+        return regex_chunk_bounds(text, val)
+    if mode == "bytes":
+        bounds, pos, current = [], 0, 0
+        for no, piece in _iter_byte_pieces([text], int(val), enc):
+            if no != current:
+                bounds.append([pos, pos])
+                current = no
+            pos += len(piece)
+            bounds[-1][1] = pos
+        return [tuple(b) for b in bounds]
+    size = int(val)
+    if mode == "chars":
+        return [(i, min(i + size, len(text))) for i in range(0, len(text), size)]
+    # lines
+    bounds, pos = [], 0
+    lines = text.splitlines(keepends=True)
+    for i in range(0, len(lines), size):
+        end = pos + sum(map(len, lines[i:i + size]))
+        bounds.append((pos, end))
+        pos = end
+    return bounds
+
+SPLIT_STREAM_THRESHOLD = 64 * 1024 * 1024  # 이보다 큰 파일은 전체를 읽지 않고 스트리밍으로 분할
+SPLIT_OVERLAP = 4096  # 정규식 모드: 창 경계에 걸친 제목도 찾도록 남겨 두는 글자 수 (제목 + 앞뒤 문맥보다 길어야 함)
+# 스트리밍 분할(SPLIT_STREAM_THRESHOLD 이상)에서는 매치가 overlap 글자보다 길 수 있는 패턴(예: 第[\s\S]+?章)이
+# 작은 파일과 다르게 나뉠 수 있음. 그런 패턴은 overlap 을 가장 긴 매치보다 크게 줄 것
+_LINE_BREAKS = "\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029"  # str.splitlines 가 줄 끝으로 보는 글자
+
+def iter_split_pieces(blocks, mode, val, overlap=SPLIT_OVERLAP, enc="utf-8"):
+    # 텍스트 블록을 받아 (조각 번호, 텍스트) 를 완성되는 대로 내보냄. 조각 번호는 1부터
+    # blocks 는 TextCleaner.iter_clean 결과처럼 \r\n 이 블록 사이에서 갈라지지 않아야 함
+    if mode == "regex":
+        return _iter_regex_pieces(blocks, compile_split_pattern(val), max(1, overlap))
+    size = int(val)
+    if size <= 0: raise ValueError("분할 크기는 1 이상이어야 합니다.")
+    if mode == "bytes":
+        return _iter_byte_pieces(blocks, size, enc)
+    if mode == "chars":
+        return _iter_char_pieces(blocks, size)
+    return _iter_line_pieces(blocks, size)
+
+def _iter_char_pieces(blocks, size):
+    no, used = 1, 0
+    for block in blocks:
+        pos = 0
+        while pos < len(block):
+            if used == size: no, used = no + 1, 0
+            take = min(size - used, len(block) - pos)
+            yield no, block[pos:pos + take]
+            pos += take
+            used += take
+
+def _iter_line_pieces(blocks, size):
+    no, count = 1, 0
+    for block in blocks:
+        lines = []
+        for line in block.splitlines(keepends=True):
+            if count == size:
+                if lines: yield no, "".join(lines)
+                no, count, lines = no + 1, 0, []
+            lines.append(line)
+            if line[-1] in _LINE_BREAKS: count += 1
+        if lines: yield no, "".join(lines)
+
+def _encoded_len(text, enc, head=0):
+    # 파일에 쓸 때와 같은 errors="replace" 로 인코딩한 길이. head: BOM 처럼 인코딩할 때마다 붙는 머리 길이
+    return len(text.encode(enc, errors="replace")) - head
+
+def _fit_prefix(line, room, enc, head):
+    # line 앞부분 중 room 바이트 안에 들어가는 가장 긴 부분의 (글자 수, 바이트 수). 글자(코드 포인트) 경계에서만 자르므로
+    # 멀티바이트 문자가 갈라지지 않음. 글자마다 1바이트 이상이므로 room 글자 안에서 이분 탐색
+    lo, hi, lo_bytes = 0, min(len(line), room), 0
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        used = _encoded_len(line[:mid], enc, head)
+        if used <= room: lo, lo_bytes = mid, used
+        else: hi = mid - 1
+    if lo > 1 and line[lo - 1] == "\r" and line[lo] == "\n":  # \r\n 은 갈라놓지 않음
+        lo -= 1
+        lo_bytes = _encoded_len(line[:lo], enc, head)
+    if lo == 0:  # 한 글자도 안 들어가는 아주 작은 한도: 멈추지 않도록 한 글자는 넣음
+        lo, lo_bytes = 1, _encoded_len(line[:1], enc, head)
+    return lo, lo_bytes
+
+BYTE_SPLIT_GROUP = 64  # 바이트 모드: 줄 여러 개를 한 번에 인코딩해 크기를 셈 (짧은 줄이 수백만 개일 때 호출 비용 절감)
+
+def _iter_byte_pieces(blocks, size, enc):
+    # 조각마다 enc 로 인코딩한 크기가 size 바이트를 넘지 않게 자름. 줄 단위로 채우다가 다음 줄이 안 들어가면
+    # 그 앞 줄 끝에서 끊고, 한 줄이 size 보다 길 때만 줄 중간(글자 경계)에서 자름
+    # 바이트 수는 줄(묶음) 단위로 한 번만 인코딩해 누적하므로 조각마다 본문을 다시 인코딩하지 않음.
+    # 묶음이 통째로 들어가면 그대로 더하고, 조각 경계가 걸린 묶음만 줄마다 셈
+    head = len("".encode(enc))  # utf-16 의 BOM 등: 파일마다 한 번 붙음
+    budget = size - head
+    if budget <= 0: raise ValueError("분할 크기가 너무 작습니다.")
+    no, used, lines, carry = 1, 0, [], ""
+    blocks = iter(blocks)
+    while True:
+        block = next(blocks, None)
+        text = carry + (block or "")
+        parts = text.splitlines(keepends=True)
+        carry = ""
+        # 블록 끝의 끝나지 않은 줄은 다음 블록과 이어 붙여서 판단 (한도보다 길어진 줄은 어차피 잘리므로 바로 처리)
+        if block is not None and parts and parts[-1][-1] not in _LINE_BREAKS and len(parts[-1]) <= budget:
+            carry = parts.pop()
+        for g in range(0, len(parts), BYTE_SPLIT_GROUP):
+            group = parts[g:g + BYTE_SPLIT_GROUP]
+            cost = _encoded_len("".join(group), enc, head)
+            if used + cost <= budget:
+                lines.extend(group)
+                used += cost
+                continue
+            for i, line in enumerate(group, g):
+                cost = _encoded_len(line, enc, head)
+                if used + cost <= budget:
+                    lines.append(line)
+                    used += cost
+                    continue
+                if used:  # 지금 조각은 앞 줄 끝에서 닫음 (앞부분은 이전 블록에서 이미 내보냈을 수 있음)
+                    if lines: yield no, "".join(lines)
+                    no, used, lines = no + 1, 0, []
+                while cost > budget:
+                    k, k_bytes = _fit_prefix(line, budget, enc, head)
+                    yield no, line[:k]
+                    no, line, cost = no + 1, line[k:], cost - k_bytes
+                if block is not None and i == len(parts) - 1 and line[-1:] not in _LINE_BREAKS:
+                    carry = line  # 잘리고 남은 끝나지 않은 줄은 다음 블록과 이어서 다시 판단
+                elif line:
+                    lines, used = [line], cost
+        if lines:  # 조각이 아직 안 찼어도 블록마다 내보내 메모리를 묶어 두지 않음 (같은 번호로 이어 씀)
+            yield no, "".join(lines)
+            lines = []
+        if block is None: break
+
+def _iter_regex_pieces(blocks, pattern, overlap):
+    # 마지막 overlap 글자 안에서 시작하는 매치는 다음 블록이 와야 확정되므로 보류
+    buf, emitted, search = "", 0, 0  # emitted: buf 안에서 이미 내보낸 위치, search: 다음 검색 시작 위치
+    no, has_text = 1, False
+    blocks = iter(blocks)
+    while True:
+        block = next(blocks, None)
+        eof = block is None
+        if not eof:
+            buf += block
+            if len(buf) - search < 2 * overlap: continue
+        safe = len(buf) if eof else len(buf) - overlap
+        for m in pattern.finditer(buf, search):
+            if not eof and m.start() >= safe: break
+            if m.start() > emitted:
+                yield no, buf[emitted:m.start()]
+                emitted, has_text = m.start(), True
+            if has_text: no, has_text = no + 1, False
+            search = m.end()
+        if eof:
+            if len(buf) > emitted: yield no, buf[emitted:]
+            return
+        if safe > emitted:
+            yield no, buf[emitted:safe]
+            emitted, has_text = safe, True
+        search = max(search, safe)
+        cut = max(0, min(emitted, search) - overlap)  # 뒤쪽 검색(\b, 뒤보기)용 문맥은 남겨 둠
+        buf, emitted, search = buf[cut:], emitted - cut, search - cut
+
+def split_chunk_name(base, no):
+    return f"{base}_{no:07d}.txt"
+
+def write_split_pieces(pieces, open_chunk, on_chunk=None):
+    # 조각 번호가 바뀔 때마다 open_chunk(번호) 로 새 텍스트 파일을 열어 바로 씀. 반환값: 만든 파일 수
+    out, current = None, 0
+    try:
+        for no, piece in pieces:
+            if no != current:
+                if out: out.close()
+                out = open_chunk(no)
+                current = no
+                if on_chunk: on_chunk(no)
+            out.write(piece)
+    finally:
+        if out: out.close()
+    return current
+
+def split_to_files(pieces, save_dir, base, enc, on_chunk=None):
+    open_chunk = lambda no: open(os.path.join(save_dir, split_chunk_name(base, no)), "w", encoding=enc, errors="replace")
+    return write_split_pieces(pieces, open_chunk, on_chunk)
+
+# ---------- 분할 결과 묶음 (ZIP) ----------
+
+ZIP_MEMBER_SEP = "::"  # 병합 목록에서 "묶음.zip::조각.txt" 형태로 ZIP 안의 조각을 가리킴
+SPLIT_CONTAINERS = {"stored": zipfile.ZIP_STORED, "deflate": zipfile.ZIP_DEFLATED}
+
+def split_to_zip(pieces, zip_path, base, enc, compression="stored", on_chunk=None):
+    # 조각 파일 수천 개 대신 ZIP 하나에 같은 이름({base}_{i:07d}.txt)으로 차례대로 기록
+    with zipfile.ZipFile(zip_path, "w", SPLIT_CONTAINERS[compression]) as zf:
+        open_chunk = lambda no: io.TextIOWrapper(zf.open(split_chunk_name(base, no), "w"), encoding=enc, errors="replace")
+        return write_split_pieces(pieces, open_chunk, on_chunk)
+
+def is_container_member(path):
+    return ZIP_MEMBER_SEP in path
+
+def container_member_path(zip_path, name):
+    return f"{zip_path}{ZIP_MEMBER_SEP}{name}"
+
+@lru_cache(maxsize=8)
+def _open_container(zip_path, mtime_ns, pid):
+    return zipfile.ZipFile(zip_path)
+
+def open_container(zip_path):
+    # 목차(central directory)를 매번 다시 읽지 않도록 열린 ZipFile 재사용 (수정되면 새로 엶)
+    # 프로세스마다 따로 엶: fork 한 풀 프로세스가 물려받은 파일은 읽기 위치를 공유해 서로 읽기가 뒤섞임
+    return _open_container(zip_path, os.stat(zip_path).st_mtime_ns, os.getpid())
+
+def list_container_chunks(zip_path):
+    # 기록된 순서 = 조각 번호 순서
+    return [info.filename for info in open_container(zip_path).infolist() if not info.is_dir()]
+
+def read_container_bytes(member_path):
+    zip_path, _, name = member_path.partition(ZIP_MEMBER_SEP)
+    return open_container(zip_path).read(name)
+
+def read_container_chunk(zip_path, n):
+    # n 번째 (1부터) 조각의 텍스트. 범위 밖이면 None
+    names = list_container_chunks(zip_path)
+    if not 1 <= n <= len(names): return None
+    return decode_with_autodetect(read_container_bytes(container_member_path(zip_path, names[n - 1])))[0]
+
+def read_container_member(member_path, cleaner=TEXT_CLEANER):
+    # 병합용: 조각 하나를 통째로 읽어 인코딩 감지 후 정제 (조각은 작으므로 스트리밍하지 않음)
+    return cleaner.clean(decode_with_autodetect(read_container_bytes(member_path))[0])
+
+def expand_containers(paths):
+    # 병합 목록에 ZIP 을 넣으면 그 안의 조각들로 펼침
+    for path in paths:
+        if path.lower().endswith(".zip") and not is_container_member(path) and zipfile.is_zipfile(path):
+            for name in list_container_chunks(path):
+                yield container_member_path(path, name)
+        else:
+            yield path
+
+def input_stat(path):
+    # ZIP 안의 조각은 ZIP 파일 자체의 크기/수정시각으로 대신함
+    if is_container_member(path):
+        return os.stat(path.partition(ZIP_MEMBER_SEP)[0])
+    return os.stat(path)
+
+def input_size(path):
+    if is_container_member(path):
+        zip_path, _, name = path.partition(ZIP_MEMBER_SEP)
+        return open_container(zip_path).getinfo(name).file_size
+    return os.path.getsize(path)
+
+def split_output_base(file_path):
+    # "책_0000001.txt" -> "책_S" (분할 탭의 기본 저장 파일명과 같은 규칙)
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    clean_name = re.sub(r'_\d{7,}$', '', name)
+    return f"{clean_name}_S"
+
+def split_file(file_path, save_dir, base, mode, val, container="files", use_index=False, on_progress=None, overlap=SPLIT_OVERLAP):
+    # 파일 하나를 분할해 save_dir 에 기록. on_progress(현재, 전체[, 만든 조각 수]). 반환값: 만든 조각 수
+    # overlap: 스트리밍 정규식 분할의 겹침 글자 수 (SPLIT_OVERLAP 참고)
+    reader = TextBlockReader(file_path)
+    enc = reader.encoding
+    indexed = chunk_offsets(file_path, val, overlap=overlap) if mode == "regex" and use_index else None
+    on_chunk = None
+    if indexed:
+        enc, offsets = indexed
+        pieces = iter_indexed_pieces(file_path, enc, offsets)
+        if on_progress: on_chunk = lambda no: on_progress(no, len(offsets))
+    elif reader.size >= SPLIT_STREAM_THRESHOLD:
+        pieces = iter_split_pieces(TEXT_CLEANER.iter_clean(reader), mode, val, overlap, enc)
+        if on_progress: on_chunk = lambda no: on_progress(reader.position, reader.size, no)
+    else:
+        text = "".join(TEXT_CLEANER.iter_clean(reader))
+        bounds = split_chunk_bounds(text, mode, val, enc)
+        pieces = ((i, text[start:end]) for i, (start, end) in enumerate(bounds, 1))
+        if on_progress: on_chunk = lambda no: on_progress(no, len(bounds))
+    if container in SPLIT_CONTAINERS:
+        return split_to_zip(pieces, os.path.join(save_dir, f"{base}.zip"), base, enc, container, on_chunk)
+    return split_to_files(pieces, save_dir, base, enc, on_chunk)
+
+SPLIT_PREVIEW_HEADING = 40  # 미리보기에 보일 조각 첫 줄 길이
+
+def split_preview(file_path, mode, val, keep=5, overlap=SPLIT_OVERLAP):
+    # 파일을 쓰지 않고 분할 결과만 훑어봄 (정제 + 경계 검색만, 인코딩/쓰기 없음, 메모리는 블록 단위)
+    # 반환값: {"chunks", "min", "median", "max", "unit", "first", "last"([(번호, 첫 줄)])}
+    # 크기는 글자 수, 바이트 모드에서만 출력 인코딩 기준 바이트 수
+    reader = TextBlockReader(file_path)
+    if mode == "bytes":
+        head = len("".encode(reader.encoding))
+        measure, unit = lambda piece: _encoded_len(piece, reader.encoding, head), "bytes"
+    else:
+        measure, unit = len, "chars"
+    sizes, first, last = array("Q"), [], deque(maxlen=keep)
+    current, heading = 0, None
+    for no, piece in iter_split_pieces(TEXT_CLEANER.iter_clean(reader), mode, val, overlap, reader.encoding):
+        if no != current:
+            if heading is not None: (first if len(first) < keep else last).append((current, heading[0]))
+            sizes.append(0)
+            current, heading = no, ["", False]
+        sizes[-1] += measure(piece)
+        if not heading[1]:
+            # 첫 줄이 블록 경계에서 잘렸을 수 있으므로 줄바꿈을 만나거나 충분히 길어질 때까지 이어 붙임
+            line, newline, _ = piece.partition("\n")
+            heading[0] = (heading[0] + line)[:SPLIT_PREVIEW_HEADING]
+            heading[1] = bool(newline) or len(heading[0]) >= SPLIT_PREVIEW_HEADING
+    if heading is not None: (first if len(first) < keep else last).append((current, heading[0]))
+    return {
+        "chunks": len(sizes),
+        "min": min(sizes, default=0),
+        "median": int(statistics.median(sizes)) if sizes else 0,
+        "max": max(sizes, default=0),
+        "unit": unit,
+        "first": [(no, h.strip()) for no, h in first],
+        "last": [(no, h.strip()) for no, h in last],
+    }
+
+def format_split_preview(preview):
+    lines = [f"조각 수: {preview['chunks']}",
+             f"크기({'바이트' if preview['unit'] == 'bytes' else '글자'}): 최소 {preview['min']:,} / 중앙 {preview['median']:,} / 최대 {preview['max']:,}",
+             "", "처음:"]
+    lines.extend(f"  {no:07d}  {heading}" for no, heading in preview["first"])
+    if preview["last"]:
+        lines.append("마지막:")
+        lines.extend(f"  {no:07d}  {heading}" for no, heading in preview["last"])
+    return "\n".join(lines)
+
+def split_book(file_path, save_dir, mode, val, container="files", use_index=False, overlap=SPLIT_OVERLAP):
+    # 일괄 분할의 작업 하나: 책마다 save_dir/{책}_S/ 폴더에 조각을 씀. 프로세스 풀에서 돌도록 모듈 함수로 둠
+    # 반환값: (조각 수, 걸린 시간, 오류 메시지 또는 None, 인코딩 캐시 항목)
+    started = time.perf_counter()
+    try:
+        base = split_output_base(file_path)
+        out_dir = os.path.join(save_dir, base)
+        os.stat(file_path)  # 없는 파일이면 빈 폴더를 만들기 전에 실패
+        os.makedirs(out_dir, exist_ok=True)
+        count, error = split_file(file_path, out_dir, base, mode, val, container, use_index, overlap=overlap), None
+    except Exception as e:
+        count, error = 0, str(e)
+    return count, time.perf_counter() - started, error, ENCODING_CACHE.export([file_path])
+
+def run_split_batch(files, save_dir, mode, val, container="files", use_index=False, workers=1, on_progress=None, checkpoint=None,
+                    overlap=SPLIT_OVERLAP):
+    # 여러 책을 프로세스 풀로 나눠 분할. on_progress(끝난 책 수, 전체 책 수)
+    # 반환값: 입력 순서대로 [(경로, 조각 수, 걸린 시간, 오류)]. 책 하나가 실패해도 나머지는 계속함
+    if mode == "regex": re.compile(val)  # 패턴 오류는 작업을 나눠 주기 전에 한 번만 알림
+    # "책.txt" 와 "책_0000001.txt" 처럼 같은 {이름}_S 폴더로 가는 책이 있으면 서로 조각을 덮어쓰므로 미리 거부
+    seen = {}
+    for path in files:
+        base = split_output_base(path)
+        if base in seen:
+            raise ValueError(f"저장 폴더 이름이 겹칩니다 ({base}): {os.path.basename(seen[base])}, {os.path.basename(path)}")
+        seen[base] = path
+    results = run_file_batch(split_book, files, (save_dir, mode, val, container, use_index, overlap), workers, on_progress, checkpoint)
+    return [(path,) + result for path, result in zip(files, results)]
+
+def format_split_summary(results, limit=30):
+    lines = []
+    for path, count, seconds, error in results[:limit]:
+        name = os.path.basename(path)
+        lines.append(f"{name}: 오류 - {error}" if error else f"{name}: {count}개, {seconds:.1f}초")
+    if len(results) > limit:
+        lines.append(f"... 외 {len(results) - limit}개")
+    return "\n".join(lines)
+
+# ---------- 정제 / 인코딩 확인 ----------
+
+def clean_file(file_path, out_path):
+    # 파일 하나를 원래 인코딩 그대로 정제해 out_path 에 씀 (같은 경로면 임시 파일을 거쳐 제자리에서)
+    # 정제할 글자가 없고 인코딩도 그대로 쓸 수 있으면 다시 쓰지 않음 (다른 경로면 복사만)
+    # 반환값: (인코딩, 다시 썼는지, 걸린 시간, 오류 메시지 또는 None, 인코딩 캐시 항목)
+    started = time.perf_counter()
+    enc, rewritten, error = None, False, None
+    try:
+        reader = TextBlockReader(file_path)
+        enc = reader.encoding
+        rewritten = needs_rewrite(reader, enc)
+        if rewritten:
+            atomic_write_text(out_path, TextBlockReader(file_path), enc)
+            ENCODING_CACHE.put(out_path, enc, clean_mark=TEXT_CLEANER.signature)
+        elif os.path.abspath(out_path) != os.path.abspath(file_path):
+            shutil.copyfile(file_path, out_path)
+    except Exception as e:
+        error = str(e)
+    return enc, rewritten, time.perf_counter() - started, error, ENCODING_CACHE.export([file_path, out_path])
+
+def detect_file(file_path):
+    # 반환값: (인코딩, 오류 메시지 또는 None, 인코딩 캐시 항목)
+    try:
+        os.stat(file_path)  # detect_file_encoding 은 읽기 실패를 utf-8 로 넘기므로 없는 파일은 여기서 오류로
+        enc, error = detect_file_encoding(file_path), None
+    except Exception as e:
+        enc, error = None, str(e)
+    return enc, error, ENCODING_CACHE.export([file_path])
+
+# ---------- 장 위치 색인 ----------
+
+CHAPTER_INDEX_SUFFIX = ".chapidx"
+_INDEX_MAGIC = b"TTCHIDX1"
+_INDEX_HEADER = struct.Struct("<8sQQ16sI")  # 매직, 크기, 수정시각, 해시, 항목 수
+# 색인을 만들 수 있는 인코딩 -> 파일 중간(조각 시작)부터 디코딩할 때 쓸 코덱
+_INDEX_CODECS = {"utf-8": "utf-8", "utf-8-sig": "utf-8", "gb18030": "gb18030", "ascii": "ascii"}
+
+def _pack_str(value):
+    data = value.encode("utf-8", "surrogatepass")
+    return struct.pack("<I", len(data)) + data
+
+def _unpack_str(data, pos):
+    (n,) = struct.unpack_from("<I", data, pos)
+    pos += 4
+    return data[pos:pos + n].decode("utf-8", "surrogatepass"), pos + n
+
+class ChapterIndex:
+    # 입력 파일 옆 "<파일>.chapidx" 에 패턴별 조각 시작 바이트 오프셋을 저장하는 이진 색인
+    # 크기/수정시각이 같으면 그대로 쓰고, 수정시각만 다르면 내용 해시로 확인
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.path = file_path + CHAPTER_INDEX_SUFFIX
+        st = os.stat(file_path)
+        self.size, self.mtime_ns = st.st_size, st.st_mtime_ns
+        self.digest = None
+        self.stale_mtime = False  # 내용은 같고 수정시각만 바뀜 -> 다음 저장 때 갱신
+        self.entries = {}  # (패턴, 정제 규칙 서명) -> (인코딩, array('Q') 오프셋)
+
+    @classmethod
+    def load(cls, file_path):
+        index = cls(file_path)
+        try:
+            with open(index.path, "rb") as f:
+                data = f.read()
+            magic, size, mtime_ns, digest, count = _INDEX_HEADER.unpack_from(data, 0)
+        except (OSError, struct.error):
+            return index
+        if magic != _INDEX_MAGIC or size != index.size:
+            return index
+        if mtime_ns != index.mtime_ns:
+            if file_hash(file_path) != digest.hex():
+                return index
+            index.stale_mtime = True
+        index.digest = digest.hex()
+        try:
+            pos = _INDEX_HEADER.size
+            for _ in range(count):
+                pattern, pos = _unpack_str(data, pos)
+                signature, pos = _unpack_str(data, pos)
+                enc, pos = _unpack_str(data, pos)
+                (n,) = struct.unpack_from("<I", data, pos)
+                pos += 4
+                offsets = array("Q", data[pos:pos + 8 * n])
+                if sys.byteorder == "big": offsets.byteswap()
+                pos += 8 * n
+                index.entries[(pattern, signature)] = (enc, offsets)
+        except (struct.error, ValueError, UnicodeDecodeError):
+            index.entries.clear()
+        return index
+
+    def lookup(self, pattern, cleaner=TEXT_CLEANER):
+        return self.entries.get((pattern, cleaner.signature))
+
+    def store(self, pattern, enc, offsets, cleaner=TEXT_CLEANER):
+        self.entries[(pattern, cleaner.signature)] = (enc, array("Q", offsets))
+
+    def save(self):
+        if self.digest is None: self.digest = file_hash(self.file_path)
+        parts = [_INDEX_HEADER.pack(_INDEX_MAGIC, self.size, self.mtime_ns, bytes.fromhex(self.digest), len(self.entries))]
+        for (pattern, signature), (enc, offsets) in self.entries.items():
+            offsets = array("Q", offsets)
+            if sys.byteorder == "big": offsets.byteswap()
+            parts += [_pack_str(pattern), _pack_str(signature), _pack_str(enc), struct.pack("<I", len(offsets)), offsets.tobytes()]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(parts))
+        os.replace(tmp_path, self.path)
+
+def _char_to_byte_offsets(reader, char_offsets):
+    # 디코딩한 글자 위치 -> 원본 파일 바이트 위치 (블록별로 다시 인코딩해 길이를 셈)
+    mid_codec = _INDEX_CODECS[_codec_name(reader.encoding)]
+    byte_pos = len(codecs.BOM_UTF8) if _codec_name(reader.encoding) == "utf-8-sig" else 0
+    char_pos, result, targets = 0, [], iter(char_offsets)
+    target = next(targets, None)
+    for block in reader:
+        end = char_pos + len(block)
+        done = 0  # 이 블록에서 바이트 수를 이미 센 글자 수
+        while target is not None and target < end:
+            byte_pos += len(block[done:target - char_pos].encode(mid_codec))
+            done = target - char_pos
+            result.append(byte_pos)
+            target = next(targets, None)
+        byte_pos += len(block[done:].encode(mid_codec))
+        char_pos = end
+    while target is not None:
+        result.append(byte_pos)
+        target = next(targets, None)
+    return result
+
+def build_chunk_offsets(file_path, pattern, cleaner=TEXT_CLEANER, overlap=SPLIT_OVERLAP):
+    # 정규식 분할 조각의 시작 바이트 오프셋. 색인으로 쓸 수 없는 파일이면 None
+    reader = TextBlockReader(file_path)
+    if _codec_name(reader.encoding) not in _INDEX_CODECS or not cleaner.single_char:
+        return None
+    if reader.size < SPLIT_STREAM_THRESHOLD:
+        text = "".join(cleaner.iter_clean(reader))
+        char_starts = [start for start, _ in regex_chunk_bounds(text, pattern)]
+        del text
+    else:
+        char_starts, pos, current = [], 0, 0
+        for no, piece in iter_split_pieces(cleaner.iter_clean(reader), "regex", pattern, overlap):
+            if no != current:
+                char_starts.append(pos)
+                current = no
+            pos += len(piece)
+    if reader.fallbacks:
+        return None
+    offsets = _char_to_byte_offsets(reader, char_starts)
+    if reader.fallbacks:
+        return None
+    return reader.encoding, offsets
+
+def chunk_offsets(file_path, pattern, cleaner=TEXT_CLEANER, overlap=SPLIT_OVERLAP):
+    # 색인이 있으면 읽고, 없으면 만들어 저장. 반환값: (인코딩, 오프셋 목록) 또는 None
+    # 기본값이 아닌 overlap 으로 만든 오프셋은 따로 저장 (긴 매치는 overlap 에 따라 경계가 달라질 수 있으므로)
+    key = pattern if overlap == SPLIT_OVERLAP else f"{pattern}\0overlap={overlap}"
+    index = ChapterIndex.load(file_path)
+    found = index.lookup(key, cleaner)
+    if found is None:
+        found = build_chunk_offsets(file_path, pattern, cleaner, overlap)
+        if found is None: return None
+        index.store(key, found[0], found[1], cleaner)
+    elif not index.stale_mtime:
+        return found
+    try:
+        index.save()
+    except OSError:
+        pass  # 색인은 속도를 위한 것뿐이므로 입력 폴더에 쓸 수 없어도 계산한 오프셋으로 계속 분할
+    return found
+
+def iter_indexed_pieces(file_path, enc, offsets, cleaner=TEXT_CLEANER, first=1, last=None):
+    # 색인 오프셋으로 바로 찾아가 조각을 읽음: (조각 번호, 정제된 텍스트)
+    mid_codec = _INDEX_CODECS[_codec_name(enc)]
+    size = os.path.getsize(file_path)
+    last = len(offsets) if last is None else min(last, len(offsets))
+    with open(file_path, "rb") as f:
+        for no in range(first, last + 1):
+            start = offsets[no - 1]
+            end = offsets[no] if no < len(offsets) else size
+            f.seek(start)
+            decoder = codecs.getincrementaldecoder(mid_codec)(errors="replace")
+            while start < end:
+                block = f.read(min(STREAM_BLOCK_SIZE, end - start))
+                if not block: break
+                start += len(block)
+                text = decoder.decode(block, final=start >= end)
+                if text: yield no, cleaner.clean(text)
+
+def extract_chunk(file_path, pattern, n, cleaner=TEXT_CLEANER):
+    # n 번째 (1부터) 조각만 읽어 돌려줌. 범위 밖이거나 색인을 쓸 수 없으면 None
+    found = chunk_offsets(file_path, pattern, cleaner)
+    if found is None or not 1 <= n <= len(found[1]): return None
+    enc, offsets = found
+    return "".join(piece for _, piece in iter_indexed_pieces(file_path, enc, offsets, cleaner, n, n))
+
+# ---------- 큰 파일 편집 (페이지 단위) ----------
+
+EDITOR_PAGED_THRESHOLD = 16 * 1024 * 1024  # 이보다 큰 파일은 편집기에 통째로 넣지 않고 페이지 단위로 보여 줌
+EDITOR_PAGE_BYTES = 256 * 1024  # 페이지 하나의 대략적인 크기 (이 위치 뒤의 첫 줄 끝에서 끊음)
+EDITOR_WINDOW_PAGES = 3  # 위젯에 한 번에 올려 두는 페이지 수 (보이는 곳 + 앞뒤 여유)
+# 줄바꿈 바이트(\n)가 다른 글자의 일부로 나오지 않는 인코딩: 디코딩하지 않고 바이트에서 바로 줄 경계를 찾을 수 있음
+NEWLINE_SAFE_ENCODINGS = {"utf-8", "utf-8-sig", "gb18030", "gbk", "gb2312", "cp949", "euc_kr", "big5", "big5hkscs",
+                          "cp950", "euc_jp", "shift_jis", "cp932", "ascii", "iso8859-1", "cp1252"}
+
+def can_page_file(enc):
+    return _codec_name(enc) in NEWLINE_SAFE_ENCODINGS
+
+def atomic_write_text(path, blocks, enc, cleaner=TEXT_CLEANER, size=None):
+    # 정제한 텍스트 블록을 같은 폴더의 임시 파일에 쓴 뒤 한 번에 바꿔치기 (중간에 실패해도 원본은 그대로)
+    # size: 전체 크기 (정제 백엔드를 고르는 데 씀, iter_clean 참고)
+    tmp_path = path + ".tmp"
+    encoder = codecs.getincrementalencoder(enc)(errors="replace")
+    try:
+        with open(tmp_path, "wb") as out:
+            for block in (cleaner.iter_clean(blocks, size) if cleaner else blocks):
+                out.write(encoder.encode(block))
+            out.write(encoder.encode("", final=True))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class PagedTextFile:
+    # 큰 텍스트 파일을 줄 끝에서 끊은 페이지들로 나눠 필요한 페이지만 디코딩해 읽음 (mmap, 줄 위치 색인만 메모리에)
+    # 편집한 페이지는 overlay 에 텍스트로 들고 있다가, 저장할 때 손대지 않은 원본 페이지들과 합쳐 새 파일로 씀
+    def __init__(self, path, encoding, page_bytes=EDITOR_PAGE_BYTES):
+        self.path = path
+        self.encoding = encoding
+        self.overlay = {}  # 페이지 번호 -> 편집된 텍스트
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.offsets = [0]  # 페이지 시작 바이트 위치 + 마지막에 파일 크기
+        while self.offsets[-1] < size:
+            nl = self._map.find(b"\n", self.offsets[-1] + page_bytes)
+            self.offsets.append(size if nl < 0 else nl + 1)
+        if size == 0: self.offsets.append(0)
+        # 원본 페이지별 줄 수 (전체 줄 번호 <-> 페이지 변환용)
+        self.line_counts = array("Q", (self._map[a:b].count(b"\n") for a, b in zip(self.offsets, self.offsets[1:])))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def raw_page(self, k):
+        return self._map[self.offsets[k]:self.offsets[k + 1]]
+
+    def page_text(self, k):
+        if k in self.overlay: return self.overlay[k]
+        return self.raw_page(k).decode(self.encoding, errors="replace")
+
+    def page_lines(self, k):
+        if k in self.overlay: return self.overlay[k].count("\n")
+        return self.line_counts[k]
+
+    def iter_texts(self, live=None):
+        # 문서 전체를 페이지 순서대로: live(위젯에 올라 있는 페이지) > overlay > 원본
+        live = live or {}
+        for k in range(len(self)):
+            yield live[k] if k in live else self.page_text(k)
+
+    def save(self, path, live=None, enc=None, cleaner=TEXT_CLEANER, origin_clean=False):
+        # 원본을 mmap 으로 읽으면서 같은 경로에 쓸 수 있도록 임시 파일 + 바꿔치기
+        # origin_clean: 원본이 이미 정제돼 있고 같은 인코딩이면 손대지 않은 페이지는 바이트 그대로 복사
+        enc = enc or self.encoding
+        if not origin_clean or _codec_name(enc) != _codec_name(self.encoding):
+            atomic_write_text(path, self.iter_texts(live), enc, cleaner, self.offsets[-1])
+            return
+        live = live or {}
+        edited = lambda k: k in live or k in self.overlay
+        pieces = ((k, (live[k] if k in live else self.overlay[k]) if edited(k) else self.raw_page(k)) for k in range(len(self)))
+        write_spliced(path, (data for _, data in pieces), enc, cleaner)
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap): self._map.close()
+        self._file.close()
+
+# ---------- 편집기 저장 ----------
+
+EDITOR_SAVE_LINES = 2000  # 위젯에서 한 번에 꺼내 쓰는 줄 수
+
+def line_start_offsets(data, lines, step=64 * 1024):
+    # 줄 번호들(0부터, 오름차순)이 data 안에서 시작하는 바이트 위치. 줄 수를 넘으면 len(data)
+    # 모든 줄의 위치를 만들지 않고 step 바이트씩 줄바꿈 개수만 세며 건너뛴 뒤, 마지막 구간에서만 하나씩 찾음
+    # (\n 이 다른 글자 안에 나오지 않는 인코딩에서만 의미 있음)
+    result, pos, line = [], 0, 0
+    for target in lines:
+        while line < target and pos < len(data):
+            end = min(pos + step, len(data))
+            n = data.count(b"\n", pos, end)
+            if line + n < target:
+                pos, line = end, line + n
+                continue
+            while line < target:
+                pos = data.index(b"\n", pos) + 1
+                line += 1
+        result.append(pos if line >= target else len(data))
+    return result
+
+def write_spliced(path, pieces, enc, cleaner=TEXT_CLEANER):
+    # pieces: bytes(원본에서 그대로 복사할 부분) 와 str(편집된 부분, 정제 후 인코딩) 이 섞인 순서열
+    # 임시 파일에 쓴 뒤 바꿔치기. 원본 파일을 읽으면서 같은 경로로 저장해도 됨
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as out:
+            for piece in pieces:
+                if isinstance(piece, str):
+                    piece = piece.encode(enc, errors="replace") if cleaner is None else cleaner.clean(piece).encode(enc, errors="replace")
+                out.write(piece)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+class EditedLines:
+    # 편집기 문서를 "원본 파일의 줄 구간" 과 "편집된 줄 구간" 의 연속으로 기록 (줄 번호는 0부터)
+    # runs: [[원본 시작 줄 또는 None(편집됨), 줄 수]]. 저장할 때 원본 구간은 파일에서 바이트 그대로 복사하고
+    # 편집 구간만 위젯에서 꺼내 정제/인코딩하므로 한 글자 고친 뒤의 저장은 문서 크기와 거의 무관
+    def __init__(self, line_count):
+        self.runs = [[0, line_count]] if line_count else []
+
+    @property
+    def dirty(self):
+        return any(orig is None for orig, _ in self.runs)
+
+    def edit(self, line, removed, added):
+        # 현재 줄 line..line+removed 가 line..line+added 로 바뀜 (TextEditHook 과 같은 뜻, 줄 번호만 0부터)
+        cut_a, cut_b = line, line + removed + 1
+        before, after, pos = [], [], 0
+        for orig, n in self.runs:
+            a, b = pos, pos + n
+            pos = b
+            if b <= cut_a:
+                before.append([orig, n])
+            elif a >= cut_b:
+                after.append([orig, n])
+            else:
+                if a < cut_a: before.append([orig, cut_a - a])
+                if b > cut_b: after.append([None if orig is None else orig + (cut_b - a), b - cut_b])
+        runs = []
+        for orig, n in before + [[None, added + 1]] + after:
+            if runs:
+                prev = runs[-1]
+                if prev[0] is None and orig is None:
+                    prev[1] += n
+                    continue
+                if prev[0] is not None and orig is not None and prev[0] + prev[1] == orig:
+                    prev[1] += n
+                    continue
+            runs.append([orig, n])
+        self.runs = runs
+
+    def iter_pieces(self, original, get_lines):
+        # original: 원본 파일 내용(bytes), get_lines(처음 줄, 끝 줄): 위젯의 현재 줄들 (0부터, 끝 줄 제외)
+        # 원본 구간은 bytes 조각, 편집 구간은 str 조각으로 차례대로 내보냄 (write_spliced 에 넘김)
+        edges = sorted({line for orig, n in self.runs if orig is not None for line in (orig, orig + n)})
+        offsets = dict(zip(edges, line_start_offsets(original, edges)))
+        view, pos = memoryview(original), 0
+        for orig, n in self.runs:
+            if orig is None:
+                for a in range(pos, pos + n, EDITOR_SAVE_LINES):
+                    yield get_lines(a, min(a + EDITOR_SAVE_LINES, pos + n))
+            else:
+                yield view[offsets[orig]:offsets[orig + n]]
+            pos += n
+
+# ---------- 찾기/바꾸기 ----------
+
+FIND_BATCH = 500  # 한 번에 메인 루프로 보내는 일치 개수 (한 번의 tag_add 로 칠함)
+FIND_DELAY_MS = 250  # 검색어 입력/편집이 멈춘 뒤 검색을 다시 시작할 때까지
+
+def compile_find_pattern(query, use_regex=True):
+    return compile_split_pattern(query) if use_regex else re.compile(re.escape(query))
+
+def iter_match_indices(text, pattern):
+    # text 안의 일치 구간을 Tk 색인 쌍 ("줄.칸", "줄.칸") 으로. 줄 번호는 앞에서부터 줄바꿈 개수만 세어 이어 감
+    # 빈 일치는 칠할 것이 없으므로 건너뜀
+    line, line_start, pos = 1, 0, 0
+    for m in pattern.finditer(text):
+        a, b = m.span()
+        if a == b: continue
+        n = text.count("\n", pos, a)
+        if n:
+            line += n
+            line_start = text.rfind("\n", pos, a) + 1
+        pos = a
+        n = text.count("\n", a, b)
+        end_col = b - (text.rfind("\n", a, b) + 1 if n else line_start)
+        yield f"{line}.{a - line_start}", f"{line + n}.{end_col}"
+
+def plan_replace_all(text, pattern, repl):
+    # 모두 바꾸기 결과를 계산만 함. 첫 일치가 있는 줄부터 마지막 일치가 있는 줄까지만 새로 만들어
+    # (처음 줄, 끝 줄(포함, 1부터), 새 내용, 바꾼 개수) 로 돌려줌. 일치가 없으면 None
+    # 위젯에는 이 구간을 한 번의 replace 로 넣으므로 일치가 수천 개여도 편집은 한 번이고, 나머지 줄은 그대로
+    first = last = None
+    for m in pattern.finditer(text):
+        if first is None: first = m.start()
+        last = m.end()
+    if first is None: return None
+    # 치환은 전체 문자열에 한 번 (\b, ^ 같은 앞뒤 문맥이 그대로 맞고 m.expand 를 일치마다 부르는 것보다 훨씬 빠름)
+    # 마지막 일치 뒤는 바뀌지 않으므로 결과에서 같은 길이만큼 떼어 내면 바뀐 구간만 남음
+    replaced, count = pattern.subn(repl, text)
+    first = text.rfind("\n", 0, first) + 1
+    last = text.find("\n", last)
+    if last < 0: last = len(text)
+    first_line = text.count("\n", 0, first) + 1
+    return first_line, first_line + text.count("\n", first, last), replaced[first:len(replaced) - (len(text) - last)], count
+
+class TextSearch:
+    # 편집기 내용의 사본에서 정규식을 작업 스레드로 돌림 (Tk 위젯은 메인 루프에서만 건드림)
+    # 찾기: 일치 구간을 FIND_BATCH 개씩 ("matches", [색인...]) 으로 큐에 넣음
+    # 바꾸기(repl 지정): plan_replace_all 결과를 ("replace", 계획) 으로 넣음
+    # 끝나면 ("done", 개수) 또는 ("error", 메시지). 검색어가 바뀌면 cancel() 하고 새로 만들면 되고,
+    # 취소된 검색은 큐에 더 넣지 않으며 메인 루프도 남은 묶음을 버림
+    def __init__(self, text, pattern, repl=None, revision=0):
+        self.text = text
+        self.pattern = pattern
+        self.repl = repl
+        self.revision = revision  # 사본을 뜰 때의 편집 횟수. 바꾸기를 넣기 전에 그 사이 편집이 없었는지 확인
+        self.count = 0
+        self._cancel = threading.Event()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def events(self):
+        # 메인 루프에서: 지금까지 들어온 결과들
+        while not self.cancelled:
+            try:
+                yield self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self):
+        try:
+            if self.repl is not None:
+                plan = plan_replace_all(self.text, self.pattern, self.repl)
+                if plan: self.count = plan[3]
+                if self.cancelled: return
+                self._queue.put(("replace", plan))
+            else:
+                batch = []
+                for start, end in iter_match_indices(self.text, self.pattern):
+                    if self.cancelled: return
+                    batch += (start, end)
+                    self.count += 1
+                    if len(batch) >= 2 * FIND_BATCH:
+                        self._queue.put(("matches", batch))
+                        batch = []
+                if batch: self._queue.put(("matches", batch))
+            self._queue.put(("done", self.count))
+        except Exception as e:  # 바꿀 내용의 잘못된 \1 참조 등
+            self._queue.put(("error", str(e)))
+        finally:
+            self.text = None
+
+# ---------- 목차 ----------
+
+OUTLINE_TITLE = 40  # 목차에 보일 제목 길이
+
+def scan_chapters(text, pattern):
+    # text 에서 패턴이 나오는 줄들: [(줄 번호(0부터), 그 줄 내용)]. 한 줄에 여러 번 나와도 한 번만
+    result, line, pos = [], 0, 0
+    for m in pattern.finditer(text):
+        a = m.start()
+        line += text.count("\n", pos, a)
+        pos = a
+        if result and result[-1][0] == line: continue
+        start = text.rfind("\n", 0, a) + 1
+        end = text.find("\n", a)
+        result.append((line, text[start:end if end >= 0 else len(text)].strip()[:OUTLINE_TITLE]))
+    return result
+
+class ChapterOutline:
+    # 편집기 문서의 장 제목 목록 (VirtualListbox 의 source). 페이지마다 [(페이지 안 줄 번호, 제목)] 을 따로 들고 있어
+    # 편집이 생기면 그 페이지에서 바뀐 줄들만 다시 찾고 뒤쪽 항목은 줄 번호만 옮김. 작은 파일은 페이지 하나
+    def __init__(self, pattern, page_count=1):
+        self.pattern = pattern
+        self.pages = [[] for _ in range(page_count)]
+        self._starts = [0] * (page_count + 1)  # 페이지별 첫 항목의 전체 번호 + 마지막에 전체 개수
+
+    def __len__(self):
+        return self._starts[-1]
+
+    def entry(self, i):
+        # 전체 i 번째 항목의 (페이지, 페이지 안 줄 번호)
+        k = bisect_right(self._starts, i) - 1
+        return k, self.pages[k][i - self._starts[k]][0]
+
+    def display(self, i):
+        k = bisect_right(self._starts, i) - 1
+        return self.pages[k][i - self._starts[k]][1]
+
+    def set_page(self, k, entries):
+        old = len(self.pages[k])
+        self.pages[k] = entries
+        if len(entries) != old:
+            for j in range(k + 1, len(self._starts)): self._starts[j] += len(entries) - old
+
+    def edit(self, k, line, removed, added, text):
+        # 페이지 k 의 line..line+removed 줄이 text(added + 1 줄) 로 바뀜. 목록이 달라졌는지 돌려줌
+        entries = self.pages[k]
+        lo = bisect_left(entries, (line, ""))
+        hi = bisect_left(entries, (line + removed + 1, ""))
+        found = [(line + n, title) for n, title in scan_chapters(text, self.pattern)]
+        if found == entries[lo:hi] and removed == added: return False
+        delta = added - removed
+        self.set_page(k, entries[:lo] + found + [(n + delta, title) for n, title in entries[hi:]])
+        return True
+
+class ChapterScan:
+    # 목차 전체 훑기를 작업 스레드에서. 페이지마다 ("page", 번호, 항목들) 을 큐에 넣고 끝나면 ("done",)
+    # texts: 페이지 번호 -> 텍스트를 돌려주는 함수 (큰 파일은 mmap 에서 디코딩하므로 이것도 작업 스레드에서)
+    def __init__(self, page_count, texts, pattern):
+        self.page_count = page_count
+        self.texts = texts
+        self.pattern = pattern
+        self._cancel = threading.Event()
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self, wait=False):
+        self._cancel.set()
+        if wait and self._thread.is_alive(): self._thread.join()
+
+    def events(self):
+        while not self.cancelled:
+            try:
+                yield self._queue.get_nowait()
+            except queue.Empty:
+                return
+
+    def _run(self):
+        for k in range(self.page_count):
+            if self.cancelled: return
+            self._queue.put(("page", k, scan_chapters(self.texts(k), self.pattern)))
+        self._queue.put(("done",))
+
+# ---------- 진행 상황 ----------
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    if seconds >= 3600: return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+class ProgressTracker:
+    # 진행률에서 처리 속도(개/s, MB/s)와 남은 시간을 계산. total_bytes 는 작업 전체의 입력 크기 (모르면 0)
+    def __init__(self, total_bytes=0):
+        self.total_bytes = total_bytes
+        self.started = time.monotonic()
+        self.done, self.total, self.files = 0, 0, 0
+
+    def update(self, done, total, files=None):
+        self.done, self.total = done, total
+        self.files = done if files is None else files
+
+    def text(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        fraction = min(self.done / self.total, 1.0) if self.total > 0 else 0.0
+        parts = [f"진행 중: {int(fraction * 100)}% ({self.done}/{self.total})", f"{self.files / elapsed:.0f}개/s"]
+        if self.total_bytes:
+            parts.append(f"{fraction * self.total_bytes / elapsed / 1e6:.1f}MB/s")
+        if 0 < fraction < 1:
+            parts.append(f"남은 시간 {format_duration(elapsed * (1 - fraction) / fraction)}")
+        return " · ".join(parts)
+
+class ProgressChannel:
+    # 작업 스레드 -> Tk 메인 루프. 작업 스레드는 큐에 넣기만 하고 위젯은 건드리지 않음
+    # 메인 루프가 after() 로 INTERVAL_MS 마다 큐를 비우며, 진행률은 마지막 값만 그리므로
+    # 조각이 수만 개여도 화면 갱신은 초당 몇 번뿐
+    INTERVAL_MS = 100
+    POST_INTERVAL = 0.02  # 작업 스레드 쪽에서도 이보다 잦은 진행률은 큐에 넣지 않음 (마지막 값은 항상 넣음)
+
+    def __init__(self, root, progress_bar, status_label):
+        self.root = root
+        self.progress_bar = progress_bar
+        self.status_label = status_label
+        self.tracker = ProgressTracker()
+        self._queue = queue.SimpleQueue()
+        self._last_post = 0.0
+        self.root.after(self.INTERVAL_MS, self._drain)
+
+    # 아무 스레드에서나 호출
+    def start(self, total_bytes=0):
+        self._queue.put(("start", total_bytes))
+
+    def progress(self, done, total, files=None):
+        now = time.monotonic()
+        if done < total and now - self._last_post < self.POST_INTERVAL: return
+        self._last_post = now
+        self._queue.put(("progress", done, total, files))
+
+    def status(self, text):
+        self._queue.put(("status", text))
+
+    def dialog(self, kind, title, text):
+        # 작업 스레드에서 messagebox 를 직접 띄우지 않고 메인 루프에서 messagebox.show{kind} 로 띄움
+        self._queue.put(("dialog", kind, title, text))
+
+    # 메인 루프에서만
+    def _drain(self):
+        latest = None
+        try:
+            while True:
+                event = self._queue.get_nowait()
+                if event[0] == "progress":
+                    latest = event
+                    continue
+                if latest: self._apply(latest)
+                latest = None
+                self._apply(event)
+        except queue.Empty:
+            pass
+        if latest: self._apply(latest)
+        self.root.after(self.INTERVAL_MS, self._drain)
+
+    def _apply(self, event):
+        kind = event[0]
+        if kind == "start":
+            self.tracker = ProgressTracker(event[1])
+            self.progress_bar["value"] = 0
+        elif kind == "progress":
+            self.tracker.update(*event[1:])
+            self.progress_bar["value"] = int(event[1] / event[2] * 100) if event[2] > 0 else 0
+            self.status_label.config(text=self.tracker.text())
+        elif kind == "status":
+            self.status_label.config(text=event[1])
+        elif kind == "dialog":
+            getattr(messagebox, "show" + event[1])(event[2], event[3])
+
+# ---------- 작업 대기열 ----------
+
+JOB_WORKERS = 1  # 동시에 돌릴 작업 수. 작업마다 안에서 이미 여러 프로세스를 쓰므로 기본은 차례대로 하나씩
+JOB_HISTORY = 20  # 목록에 남겨 둘 끝난 작업 수
+
+class JobCancelled(Exception):
+    pass
+
+class Job:
+    # 대기열에 넣은 작업 하나. 작업 함수는 진행률을 report() 로 알리고, 그때마다 일시정지/취소를 확인함 (협조적)
+    WAITING, RUNNING, PAUSED, CANCELLED, DONE, FAILED = "대기", "실행 중", "일시정지", "취소됨", "완료", "오류"
+
+    def __init__(self, name, func, on_progress=None):
+        self.name = name
+        self.func = func
+        self.on_progress = on_progress
+        self.state = Job.WAITING
+        self.done, self.total = 0, 0
+        self.future = None
+        self._cancel = threading.Event()
+        self._resume = threading.Event()
+        self._resume.set()
+
+    @property
+    def finished(self):
+        return self.state in (Job.CANCELLED, Job.DONE, Job.FAILED)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def paused(self):
+        return not self._resume.is_set()
+
+    @property
+    def percent(self):
+        return int(self.done / self.total * 100) if self.total > 0 else 0
+
+    # 작업 스레드에서
+    def report(self, done, total, files=None):
+        self.done, self.total = done, total
+        if self.on_progress: self.on_progress(done, total, files)
+        self.checkpoint()
+
+    def checkpoint(self):
+        if not self._resume.is_set():
+            self.state = Job.PAUSED
+            self._resume.wait()
+            if not self._cancel.is_set(): self.state = Job.RUNNING
+        if self._cancel.is_set(): raise JobCancelled()
+
+    # 아무 스레드에서나
+    def pause(self):
+        if not self.finished: self._resume.clear()
+
+    def resume(self):
+        self._resume.set()
+
+    def cancel(self):
+        self._cancel.set()
+        self._resume.set()  # 일시정지 중이면 깨워서 취소를 알아차리게 함
+
+class JobScheduler:
+    # 병합/분할 작업 대기열. 최대 workers 개의 작업 스레드로 들어온 차례대로 실행하므로
+    # 버튼을 여러 번 눌러도 작업끼리 진행 표시나 출력 파일을 두고 다투지 않음
+    def __init__(self, workers=JOB_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers))
+        self._lock = threading.Lock()
+        self.jobs = []
+
+    def submit(self, name, func, on_progress=None):
+        # func(job) 을 대기열에 넣음
+        job = Job(name, func, on_progress)
+        with self._lock:
+            finished = [j for j in self.jobs if j.finished]
+            for old in finished[:max(0, len(finished) - JOB_HISTORY)]:
+                self.jobs.remove(old)
+            self.jobs.append(job)
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        try:
+            job.checkpoint()  # 기다리는 동안 취소/일시정지된 경우
+            job.state = Job.RUNNING
+            job.func(job)
+            job.state = Job.DONE
+        except JobCancelled:
+            job.state = Job.CANCELLED
+        except Exception:
+            job.state = Job.FAILED
+            raise
+
+    def active(self):
+        with self._lock:
+            return [job for job in self.jobs if not job.finished]
+
+    def cancel_all(self):
+        # 창을 닫을 때: 일시정지 중인 작업도 깨워서 끝나게 함 (안 그러면 프로세스가 종료되지 않음)
+        for job in self.active(): job.cancel()
+
+    def join(self):
+        # 지금까지 넣은 작업이 모두 끝날 때까지 기다림
+        with self._lock:
+            futures = [job.future for job in self.jobs]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+
+# ---------- 위젯 ----------
+
+class TextEditHook:
+    # Text 위젯의 Tcl 명령을 가로채 insert/delete/replace 가 일어날 때마다 on_edit(시작 줄, 지운 줄 수, 넣은 줄 수) 호출
+    # (키 입력, 붙여넣기, 프로그램에서 바꾼 것 모두). paused 동안에는 알리지 않음
+    def __init__(self, widget, on_edit):
+        self.widget = widget
+        self.on_edit = on_edit
+        self.paused = False
+        self._orig = widget._w + "_orig"
+        widget.tk.call("rename", widget._w, self._orig)
+        widget.tk.createcommand(widget._w, self._dispatch)
+
+    def _call(self, *args):
+        return self.widget.tk.call((self._orig,) + args)
+
+    def _line(self, index, last_line):
+        # "end" 는 마지막 줄바꿈 뒤를 가리키지만 Tk 는 그 앞에 넣고 지우므로 마지막 줄로 맞춤
+        return min(int(str(self._call("index", index)).split(".")[0]), last_line)
+
+    def _dispatch(self, cmd, *args):
+        if self.paused or cmd not in ("insert", "delete", "replace") or not args:
+            return self._call(cmd, *args)
+        last_line = int(str(self._call("index", "end-1c")).split(".")[0])
+        if cmd == "insert":
+            first, removed, added = self._line(args[0], last_line), 0, sum(str(t).count("\n") for t in args[1::2])
+        else:
+            first = self._line(args[0], last_line)
+            last = self._line(args[1] if len(args) > 1 else f"{args[0]} + 1 chars", last_line)
+            removed = max(0, last - first)
+            added = sum(str(t).count("\n") for t in args[2::2]) if cmd == "replace" else 0
+        result = self._call(cmd, *args)
+        self.on_edit(first, removed, added)
+        return result
+
+class VirtualListbox(ttk.Frame if ttk else object):
+    # 보이는 줄만 Listbox 에 채우는 가상 목록. source 는 len() 과 display(i) 를 제공
+    def __init__(self, master, source, height=25, **kwargs):
+        super().__init__(master)
+        self.source = source
+        self.rows = height
+        self.top = 0
+        self.selected = set()
+        self.listbox = tk.Listbox(self, height=height, selectmode="multiple", exportselection=False, **kwargs)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scroll)
+        self.scrollbar.pack(side="right", fill="y")
+        self.listbox.pack(side="left", fill="both", expand=True)
+        self.listbox.bind("<<ListboxSelect>>", self._on_select)
+        self.listbox.bind("<MouseWheel>", lambda e: self._scroll_by(-1 if e.delta > 0 else 1) or "break")
+        self.listbox.bind("<Button-4>", lambda e: self._scroll_by(-1) or "break")
+        self.listbox.bind("<Button-5>", lambda e: self._scroll_by(1) or "break")
+        self.refresh()
+
+    def refresh(self):
+        total = len(self.source)
+        self.top = max(0, min(self.top, total - self.rows))
+        end = min(total, self.top + self.rows)
+        self.listbox.delete(0, tk.END)
+        if end > self.top:
+            self.listbox.insert(tk.END, *(self.source.display(i) for i in range(self.top, end)))
+        for i in range(self.top, end):
+            if i in self.selected: self.listbox.selection_set(i - self.top)
+        if total:
+            self.scrollbar.set(self.top / total, end / total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _on_select(self, event=None):
+        visible = set(self.listbox.curselection())
+        for row in range(min(self.rows, len(self.source) - self.top)):
+            if row in visible: self.selected.add(self.top + row)
+            else: self.selected.discard(self.top + row)
+
+    def _scroll_by(self, rows):
+        self.top += rows
+        self.refresh()
+
+    def _on_scroll(self, action, amount, unit=None):
+        if action == "moveto":
+            self.top = int(float(amount) * len(self.source))
+            self.refresh()
+        elif unit == "pages":
+            self._scroll_by(int(amount) * self.rows)
+        else:
+            self._scroll_by(int(amount))
+
+    def curselection(self):
+        return tuple(sorted(i for i in self.selected if i < len(self.source)))
+
+    def clear_selection(self):
+        self.selected.clear()
+        self.refresh()
+
 # ---------- 메인 앱 클래스 ----------
 class TextToolApp:
     def __init__(self, root):
@@ -70,6 +2089,61 @@ class TextToolApp:
         self.status_label.pack(pady=5)
         self.progress = ttk.Progressbar(common_frame, orient="horizontal", length=400, mode="determinate")
         self.progress.pack(pady=5, padx=10, fill="x")
+        self.progress_events = ProgressChannel(self.root, self.progress, self.status_label)
+
+        job_row = ttk.Frame(common_frame)
+        job_row.pack(fill="x", padx=10, pady=5)
+        self.job_listbox = tk.Listbox(job_row, height=3, exportselection=False)
+        self.job_listbox.pack(side="left", expand=True, fill="x")
+        job_btns = ttk.Frame(job_row)
+        job_btns.pack(side="left", padx=5)
+        ttk.Button(job_btns, text="일시정지/재개", command=self.toggle_pause_job).pack(fill="x")
+        ttk.Button(job_btns, text="작업 취소", command=self.cancel_job).pack(fill="x")
+        self.jobs = JobScheduler()
+        self._job_rows = []
+        self.refresh_jobs()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    # ---------- 작업 대기열 ----------
+    def submit_job(self, name, func):
+        job = self.jobs.submit(name, func, self.update_status)
+        if len(self.jobs.active()) > 1:
+            self.progress_events.status(f"대기열에 추가: {name}")
+        return job
+
+    def refresh_jobs(self):
+        # 메인 루프에서 주기적으로 작업 목록을 다시 그림 (바뀐 경우만)
+        rows = [f"{job.name} - {job.state}" + (f" {job.percent}%" if job.state in (Job.RUNNING, Job.PAUSED) else "") for job in self.jobs.jobs]
+        if rows != self._job_rows:
+            selected = self.job_listbox.curselection()
+            self.job_listbox.delete(0, tk.END)
+            for row in rows: self.job_listbox.insert(tk.END, row)
+            for i in selected:
+                if i < len(rows): self.job_listbox.selection_set(i)
+            self._job_rows = rows
+        self.root.after(300, self.refresh_jobs)
+
+    def selected_job(self):
+        # 목록에서 고른 작업, 없으면 실행 중인 첫 작업
+        selection = self.job_listbox.curselection()
+        jobs = self.jobs.jobs
+        if selection and selection[0] < len(jobs): return jobs[selection[0]]
+        active = self.jobs.active()
+        return active[0] if active else None
+
+    def toggle_pause_job(self):
+        job = self.selected_job()
+        if not job or job.finished: return
+        if job.paused: job.resume()
+        else: job.pause()
+
+    def cancel_job(self):
+        job = self.selected_job()
+        if job and not job.finished: job.cancel()
+
+    def on_close(self):
+        self.jobs.cancel_all()
+        self.root.destroy()
 
     def create_new_folder(self):
         base_path = self.save_path.get()
@@ -98,21 +2172,12 @@ class TextToolApp:
         if file_path:
             self.save_path.set(os.path.dirname(file_path))
 
-    def update_status(self, current, total):
-        percent = int((current / total) * 100) if total > 0 else 0
-        self.progress["value"] = percent
-        self.status_label.config(text=f"진행 중: {percent}% ({current}/{total})")
-        self.root.update_idletasks()
+    def update_status(self, current, total, files=None):
+        # 작업 스레드에서 불림: 화면은 메인 루프가 ProgressChannel 을 비우며 갱신
+        self.progress_events.progress(current, total, files)
         
     def final_clean_for_save(self, text):
-        if not text: return ""
-        text = text.replace('\ufffd', ' ')
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', ' ', text)
-        text = re.sub(r'[\uE000-\uF8FF\uD800-\uDFFF]', ' ', text)
-        bad_ws = ['\u3000', '\ufeff', '\xa0', '\u200b', '\u200c', '\u200d']
-        for ws in bad_ws:
-            text = text.replace(ws, ' ')
-        return text
+        return TEXT_CLEANER.clean(text)
 
     # ---------- 텍스트 편집 탭 ----------
     def setup_editor_tab(self):
@@ -121,35 +2186,408 @@ class TextToolApp:
         tk.Label(frame, text="", height=1).pack()
         self.editor_file_path = None
         self.editor_encoding = "utf-8"
+        self.editor_pages = None  # 큰 파일이면 PagedTextFile
+        self.editor_window = (0, -1)  # 위젯에 올라 있는 페이지 범위 (처음, 끝)
+        self.editor_dirty_pages = set()
+        self._editor_paging = False
+        self.editor_lines = EditedLines(1)  # 작은 파일: 원본 줄 구간 / 편집된 줄 구간
+        self.editor_origin = None  # (경로, (크기, 수정시각)): 저장할 때 바이트를 그대로 복사해 올 원본
 
         btn_frame = ttk.Frame(frame)
         btn_frame.pack(fill="x", pady=5)
         ttk.Button(btn_frame, text="파일 열기", command=self.editor_open_file).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="저장", command=self.editor_save_file).pack(side="left", padx=5)
         ttk.Button(btn_frame, text="다른 이름으로 저장", command=self.editor_save_as).pack(side="left", padx=5)
+        ttk.Button(btn_frame, text="목차", command=self.toggle_outline).pack(side="left", padx=5)
+        self.editor_info = ttk.Label(btn_frame, text="")
+        self.editor_info.pack(side="left", padx=5)
+
+        # 찾기/바꾸기: 검색은 작업 스레드에서 위젯 내용의 사본으로 돌리고 결과만 묶음으로 받아 칠함
+        self.editor_search = None  # 진행 중인 TextSearch
+        self.editor_revision = 0  # 위젯 내용이 바뀐 횟수
+        self._editor_find_after = None
+        self.find_query = tk.StringVar()
+        self.find_repl = tk.StringVar()
+        self.find_regex = tk.BooleanVar(value=True)
+        find_frame = ttk.Frame(frame)
+        find_frame.pack(fill="x", padx=5)
+        ttk.Label(find_frame, text="찾기:").pack(side="left")
+        find_entry = ttk.Entry(find_frame, textvariable=self.find_query, width=14)
+        find_entry.pack(side="left", padx=2)
+        find_entry.bind("<Button-1>", lambda e: find_entry.focus_set()) # 키보드 픽스
+        find_entry.bind("<Return>", lambda e: self.editor_find_next())
+        ttk.Label(find_frame, text="바꾸기:").pack(side="left")
+        repl_entry = ttk.Entry(find_frame, textvariable=self.find_repl, width=10)
+        repl_entry.pack(side="left", padx=2)
+        repl_entry.bind("<Button-1>", lambda e: repl_entry.focus_set()) # 키보드 픽스
+        ttk.Checkbutton(find_frame, text="정규식", variable=self.find_regex).pack(side="left")
+        ttk.Button(find_frame, text="다음", command=self.editor_find_next).pack(side="left", padx=2)
+        ttk.Button(find_frame, text="모두 바꾸기", command=self.editor_replace_all).pack(side="left", padx=2)
+        self.find_info = ttk.Label(find_frame, text="")
+        self.find_info.pack(side="left", padx=5)
+        self.find_query.trace_add("write", lambda *a: self.editor_find_later())
+        self.find_regex.trace_add("write", lambda *a: self.editor_find_later())
+
+        # 목차: 장 제목 목록. 파일을 열면 작업 스레드로 훑고, 편집하면 바뀐 줄만 다시 찾음
+        self.editor_outline = ChapterOutline(compile_split_pattern(CHAPTER_PATTERN))
+        self.editor_outline_scan = None  # 진행 중인 ChapterScan
+        self._outline_after = None
+        body = ttk.Frame(frame)
+        body.pack(expand=True, fill="both", padx=10, pady=10)
+        self.outline_list = VirtualListbox(body, self.editor_outline, height=20, width=14)
+        self.outline_list.listbox.bind("<<ListboxSelect>>", self.editor_outline_jump, add="+")
+        self.outline_shown = False
 
-        self.editor_text = scrolledtext.ScrolledText(frame, wrap="word", font=("맑은 고딕", 12))
-        self.editor_text.pack(expand=True, fill="both", padx=10, pady=10)
+        self.editor_text = scrolledtext.ScrolledText(body, wrap="word", font=("맑은 고딕", 12))
+        self.editor_text.pack(side="right", expand=True, fill="both")
         self.editor_text.bind("<Button-1>", lambda e: self.editor_text.focus_set()) # 키보드 픽스
+        self.editor_text.configure(yscrollcommand=self.editor_on_yscroll)
+        self.editor_text.tag_configure("find", background="yellow")
+        self.editor_hook = TextEditHook(self.editor_text, self.editor_on_edit)
 
     def editor_open_file(self):
         file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if file_path:
+            self.editor_close_pages()
+            if os.path.getsize(file_path) >= EDITOR_PAGED_THRESHOLD:
+                enc = TextBlockReader(file_path).encoding
+                if can_page_file(enc):
+                    self.editor_open_paged(file_path, enc)
+                    return
             content, enc = read_text_with_autodetect(file_path)
+            ENCODING_CACHE.save()
             self.editor_encoding = enc
+            self.editor_hook.paused = True
             self.editor_text.delete(1.0, tk.END)
             self.editor_text.insert(tk.END, content)
+            self.editor_hook.paused = False
+            self.editor_set_origin(file_path, content.count("\n") + 1)
             self.editor_file_path = file_path
+            self.editor_content_changed()
+            self.editor_outline_start()
+            self.editor_info.config(text="")
             self.update_auto_path(file_path)
             self.root.title(f"Text Tool - {file_path} ({enc})")
 
+    # 큰 파일: 페이지 색인만 만들고 보이는 곳 근처 페이지만 위젯에 올림. 스크롤이 위/아래 끝에 가까워지면
+    # 다음 페이지를 올리고 반대쪽 페이지를 내림. 내리는 페이지가 편집됐으면 overlay 에 보관
+    def editor_open_paged(self, file_path, enc, first_page=0):
+        self.editor_pages = PagedTextFile(file_path, enc)
+        self.editor_set_origin(file_path, 1)
+        self.editor_encoding = enc
+        self.editor_file_path = file_path
+        self.editor_show_pages(min(first_page, len(self.editor_pages) - 1))
+        self.editor_outline_start()
+        self.update_auto_path(file_path)
+        self.root.title(f"Text Tool - {file_path} ({enc}, 큰 파일 모드)")
+
+    def editor_close_pages(self):
+        if self.editor_outline_scan:  # 작업 스레드가 mmap 을 읽는 중일 수 있으므로 먼저 멈춤
+            self.editor_outline_scan.cancel(wait=True)
+            self.editor_outline_scan = None
+        if self.editor_pages:
+            self.editor_pages.close()
+        self.editor_pages, self.editor_window = None, (0, -1)
+        self.editor_dirty_pages = set()
+
+    def editor_page_end(self, k):
+        # 위젯 안에서 페이지 k 가 끝나는 위치
+        return f"page{k + 1}" if k < self.editor_window[1] else "end-1c"
+
+    def editor_page_line(self, k):
+        return int(self.editor_text.index(f"page{k}").split(".")[0])
+
+    def editor_page_of_line(self, line):
+        first, last = self.editor_window
+        for k in range(last, first - 1, -1):
+            if self.editor_page_line(k) <= line: return k
+        return first
+
+    def editor_pages_touching(self, first_line, last_line):
+        # first_line..last_line 줄에 걸친 페이지들 (지우기로 시작 표시가 한곳에 모인 페이지도 포함)
+        first, last = self.editor_window
+        starts = [self.editor_page_line(k) for k in range(first, last + 1)]
+        ends = starts[1:] + [int(self.editor_text.index("end-1c").split(".")[0])]
+        return [k for k, a, b in zip(range(first, last + 1), starts, ends) if a <= last_line and b >= first_line]
+
+    def editor_show_pages(self, first):
+        pages = self.editor_pages
+        # 창을 통째로 바꾸기 전에 편집한 페이지를 overlay 에 보관 (editor_unload_page 와 같음)
+        pages.overlay.update(self.editor_live_pages())
+        self.editor_dirty_pages = set()
+        last = min(len(pages) - 1, first + EDITOR_WINDOW_PAGES - 1)
+        self.editor_hook.paused = True
+        try:
+            self.editor_text.delete(1.0, tk.END)
+            for name in self.editor_text.mark_names():
+                if str(name).startswith("page"): self.editor_text.mark_unset(name)
+            for k in range(first, last + 1):
+                self.editor_text.mark_set(f"page{k}", "end-1c")
+                self.editor_text.mark_gravity(f"page{k}", "left")
+                self.editor_text.insert("end-1c", pages.page_text(k))
+        finally:
+            self.editor_hook.paused = False
+        self.editor_window = (first, last)
+        self.editor_text.yview("1.0")
+        self.editor_update_info()
+        self.editor_content_changed()
+
+    def editor_update_info(self):
+        if self.editor_pages:
+            first, last = self.editor_window
+            self.editor_info.config(text=f"페이지 {first + 1}-{last + 1}/{len(self.editor_pages)}")
+
+    def editor_on_edit(self, line, removed, added):
+        if self.editor_pages:
+            self.editor_dirty_pages.update(self.editor_pages_touching(line, line + added))
+        else:
+            self.editor_lines.edit(line - 1, removed, added)
+        self.editor_outline_edit(line, removed, added)
+        self.editor_content_changed()
+
+    def editor_content_changed(self):
+        # 편집, 파일 열기, 페이지 이동 뒤. 찾는 중인 결과는 줄 위치가 어긋나므로 잠시 뒤 새로 찾음
+        self.editor_revision += 1
+        if self.find_query.get(): self.editor_find_later()
+
+    # ---------- 목차 ----------
+    def toggle_outline(self):
+        if self.outline_shown: self.outline_list.pack_forget()
+        else: self.outline_list.pack(side="left", fill="y", padx=(0, 5))
+        self.outline_shown = not self.outline_shown
+
+    def editor_outline_start(self):
+        # 문서 전체를 작업 스레드로 다시 훑음. 위젯에 올라 있는 글은 여기서 사본을 떠서 넘기고,
+        # 큰 파일의 나머지 페이지는 작업 스레드가 직접 디코딩
+        if self._outline_after:
+            self.root.after_cancel(self._outline_after)
+            self._outline_after = None
+        if self.editor_outline_scan: self.editor_outline_scan.cancel()
+        pages = self.editor_pages
+        if pages:
+            first, last = self.editor_window
+            live = {k: self.editor_text.get(f"page{k}", self.editor_page_end(k)) for k in range(first, last + 1)}
+            texts, count = lambda k: live[k] if k in live else pages.page_text(k), len(pages)
+        else:
+            snapshot = self.editor_text.get("1.0", "end-1c")
+            texts, count = lambda k: snapshot, 1
+        self.editor_outline = ChapterOutline(self.editor_outline.pattern, count)
+        self.outline_list.source = self.editor_outline
+        self.outline_list.top = 0
+        self.outline_list.clear_selection()
+        scan = ChapterScan(count, texts, self.editor_outline.pattern).start()
+        self.editor_outline_scan = scan
+        self.root.after(ProgressChannel.INTERVAL_MS, self.editor_outline_drain, scan)
+
+    def editor_outline_drain(self, scan):
+        if scan is not self.editor_outline_scan: return
+        changed = False
+        for event in scan.events():
+            if event[0] == "page":
+                self.editor_outline.set_page(event[1], event[2])
+                changed = True
+            else:
+                self.editor_outline_scan = None
+        if changed: self.outline_list.refresh()
+        if self.editor_outline_scan: self.root.after(ProgressChannel.INTERVAL_MS, self.editor_outline_drain, scan)
+
+    def editor_outline_edit(self, line, removed, added):
+        # 바뀐 줄(위젯 줄 line..line+added)만 다시 찾음. 훑는 중이면 그 결과가 이미 어긋났으므로
+        # 멈추고, 입력이 FIND_DELAY_MS 동안 멈추면 처음부터 다시 훑음
+        if self.editor_outline_scan or self._outline_after:
+            if self.editor_outline_scan:
+                self.editor_outline_scan.cancel()
+                self.editor_outline_scan = None
+            if self._outline_after: self.root.after_cancel(self._outline_after)
+            self._outline_after = self.root.after(FIND_DELAY_MS, self.editor_outline_start)
+            return
+        text, index = self.editor_text, self.editor_outline
+        if self.editor_pages:
+            touched = self.editor_pages_touching(line, line + added)
+            if not touched: return
+            if len(touched) > 1:  # 페이지 경계를 넘는 편집: 걸친 페이지들을 통째로
+                for k in touched:
+                    index.set_page(k, scan_chapters(text.get(f"page{k}", self.editor_page_end(k)), index.pattern))
+                self.outline_list.refresh()
+                return
+            k = touched[0]
+            start = self.editor_page_line(k)
+        else:
+            k, start = 0, 1
+        if index.edit(k, line - start, removed, added, text.get(f"{line}.0", f"{line + added}.end")):
+            self.outline_list.refresh()
+
+    def editor_outline_jump(self, event=None):
+        selection = self.outline_list.curselection()
+        if not selection: return
+        self.outline_list.clear_selection()
+        k, line = self.editor_outline.entry(selection[0])
+        if self.editor_pages:
+            # 다른 곳의 장이면 그 페이지 근처를 올린 뒤 위젯 줄 번호로 바꿈
+            first, last = self.editor_window
+            if not first <= k <= last: self.editor_show_pages(max(0, k - 1))
+            line += self.editor_page_line(k)
+        else:
+            line += 1
+        self.editor_text.mark_set("insert", f"{line}.0")
+        self.editor_text.yview(f"{line}.0")
+        self.editor_text.focus_set()
+
+    # ---------- 찾기/바꾸기 ----------
+    def editor_find_later(self):
+        # 검색어나 내용이 바뀜: 진행 중인 검색은 바로 취소하고, 입력이 FIND_DELAY_MS 동안 멈추면 다시 찾음
+        if self.editor_search:
+            self.editor_search.cancel()
+            self.editor_search = None
+        if self._editor_find_after:
+            self.root.after_cancel(self._editor_find_after)
+        self._editor_find_after = self.root.after(FIND_DELAY_MS, self.editor_find_start)
+
+    def editor_find_start(self, repl=None):
+        self._editor_find_after = None
+        if self.editor_search: self.editor_search.cancel()
+        self.editor_search = None
+        self.editor_text.tag_remove("find", "1.0", tk.END)
+        query = self.find_query.get()
+        if not query:
+            self.find_info.config(text="")
+            return
+        try:
+            pattern = compile_find_pattern(query, self.find_regex.get())
+        except re.error as e:
+            self.find_info.config(text=f"패턴 오류: {e}")
+            return
+        # 메인 루프에서 하는 일은 사본을 뜨는 것뿐. 찾기와 바꿀 내용 계산은 작업 스레드에서
+        snapshot = self.editor_text.get("1.0", "end-1c")
+        search = TextSearch(snapshot, pattern, repl, self.editor_revision).start()
+        self.editor_search = search
+        self.find_info.config(text="찾는 중..." if repl is None else "바꾸는 중...")
+        self.root.after(ProgressChannel.INTERVAL_MS, self.editor_find_drain, search)
+
+    def editor_find_drain(self, search):
+        if search is not self.editor_search: return  # 취소된 검색의 남은 결과는 버림
+        for event in search.events():
+            kind = event[0]
+            if kind == "matches":
+                self.editor_text.tag_add("find", *event[1])  # 묶음 하나를 한 번에 칠함
+                self.find_info.config(text=f"{search.count}개 찾는 중...")
+            elif kind == "replace":
+                self.editor_search = None
+                self.editor_apply_replace(search, event[1])
+                return
+            elif kind == "done":
+                self.editor_search = None
+                where = " (올라온 페이지)" if self.editor_pages else ""
+                self.find_info.config(text=f"{event[1]}개{where}")
+                return
+            elif kind == "error":
+                self.editor_search = None
+                self.find_info.config(text=f"오류: {event[1]}")
+                return
+        self.root.after(ProgressChannel.INTERVAL_MS, self.editor_find_drain, search)
+
+    def editor_apply_replace(self, search, plan):
+        if plan is None:
+            self.find_info.config(text="0개")
+            return
+        if search.revision != self.editor_revision:
+            self.find_info.config(text="계산하는 사이 내용이 바뀌어 바꾸지 않았습니다")
+            return
+        # 첫 일치 줄부터 마지막 일치 줄까지를 한 번의 replace 로 (편집 기록도 이 구간 하나만 남음)
+        first, last, new, count = plan
+        self.editor_text.replace(f"{first}.0", f"{last}.end", new)
+        self.progress_events.status(f"모두 바꾸기: {count}개")
+
+    def editor_replace_all(self):
+        if not self.find_query.get(): return
+        if self._editor_find_after:
+            self.root.after_cancel(self._editor_find_after)
+        repl = self.find_repl.get()
+        if not self.find_regex.get(): repl = repl.replace("\\", "\\\\")  # 정규식이 아니면 \ 도 글자 그대로
+        self.editor_find_start(repl)
+
+    def editor_find_next(self):
+        # 커서 다음의 일치로 이동 (끝이면 처음부터)
+        text = self.editor_text
+        found = text.tag_nextrange("find", "insert + 1 chars") or text.tag_nextrange("find", "1.0")
+        if not found: return
+        text.tag_remove("sel", "1.0", tk.END)
+        text.tag_add("sel", *found)
+        text.mark_set("insert", found[0])
+        text.see(found[0])
+        text.focus_set()
+
+    def editor_on_yscroll(self, first, last):
+        self.editor_text.vbar.set(first, last)
+        if self.editor_pages and not self._editor_paging:
+            first, last = float(first), float(last)
+            if first < 0.1 and self.editor_window[0] > 0:
+                self._editor_paging = True
+                self.root.after_idle(lambda: self.editor_shift_pages(-1))
+            elif last > 0.9 and self.editor_window[1] < len(self.editor_pages) - 1:
+                self._editor_paging = True
+                self.root.after_idle(lambda: self.editor_shift_pages(1))
+
+    def editor_live_pages(self):
+        # 위젯에 올라 있는 페이지 중 편집된 것들의 현재 텍스트
+        first, last = self.editor_window
+        return {k: self.editor_text.get(f"page{k}", self.editor_page_end(k))
+                for k in range(first, last + 1) if k in self.editor_dirty_pages}
+
+    def editor_shift_pages(self, direction):
+        # 한 페이지만큼 창을 옮기고, 보던 줄이 화면 맨 위에 그대로 있도록 스크롤 위치를 맞춤
+        try:
+            text, pages = self.editor_text, self.editor_pages
+            first, last = self.editor_window
+            top = text.index("@0,0")
+            top_page = self.editor_page_of_line(int(top.split(".")[0]))
+            top_offset = int(top.split(".")[0]) - int(text.index(f"page{top_page}").split(".")[0])
+            top_col = top.split(".")[1]
+            self.editor_hook.paused = True
+            try:
+                if direction > 0:
+                    k = last + 1
+                    text.mark_set(f"page{k}", "end-1c")
+                    text.mark_gravity(f"page{k}", "left")
+                    text.insert("end-1c", pages.page_text(k))
+                    last = k
+                    if last - first + 1 > EDITOR_WINDOW_PAGES and first != top_page:
+                        self.editor_unload_page(first, f"page{first + 1}")
+                        first += 1
+                else:
+                    k = first - 1
+                    text.mark_gravity(f"page{first}", "right")  # 앞에 넣는 글은 이 표시 앞으로
+                    text.insert("1.0", pages.page_text(k))
+                    text.mark_gravity(f"page{first}", "left")
+                    text.mark_set(f"page{k}", "1.0")
+                    text.mark_gravity(f"page{k}", "left")
+                    first = k
+                    if last - first + 1 > EDITOR_WINDOW_PAGES and last != top_page:
+                        self.editor_window = (first, last)
+                        self.editor_unload_page(last, "end-1c")
+                        last -= 1
+            finally:
+                self.editor_hook.paused = False
+            self.editor_window = (first, last)
+            line = int(text.index(f"page{top_page}").split(".")[0]) + top_offset
+            text.yview(f"{line}.{top_col}")
+            self.editor_update_info()
+            self.editor_content_changed()
+        finally:
+            self._editor_paging = False
+
+    def editor_unload_page(self, k, end):
+        text = self.editor_text
+        if k in self.editor_dirty_pages:
+            self.editor_pages.overlay[k] = text.get(f"page{k}", end)
+            self.editor_dirty_pages.discard(k)
+        text.delete(f"page{k}", end)
+        text.mark_unset(f"page{k}")
+
     def editor_save_file(self):
         if self.editor_file_path:
             try:
-                content = self.editor_text.get(1.0, tk.END)
-                clean_content = self.final_clean_for_save(content)
-                with open(self.editor_file_path, "w", encoding=self.editor_encoding, errors="replace") as f:
-                    f.write(clean_content)
+                self.editor_write(self.editor_file_path)
                 messagebox.showinfo("저장 완료", f"깨진 기호를 정제하여 {self.editor_encoding}으로 저장했습니다.")
             except Exception as e:
                 messagebox.showerror("오류", f"파일을 저장할 수 없습니다: {e}")
@@ -160,16 +2598,69 @@ class TextToolApp:
         file_path = filedialog.asksaveasfilename(defaultextension=".txt", filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if file_path:
             try:
-                content = self.editor_text.get(1.0, tk.END)
-                clean_content = self.final_clean_for_save(content)
-                with open(file_path, "w", encoding=self.editor_encoding, errors="replace") as f:
-                    f.write(clean_content)
+                self.editor_write(file_path)
                 messagebox.showinfo("저장 완료", f"정제 후 새 파일로 저장되었습니다.")
                 self.editor_file_path = file_path
                 self.root.title(f"Text Tool - {file_path} ({self.editor_encoding})")
             except Exception as e:
                 messagebox.showerror("오류", f"파일을 저장할 수 없습니다: {e}")
 
+    def editor_set_origin(self, file_path, line_count, saved=False):
+        st = os.stat(file_path)
+        self.editor_origin = (file_path, (st.st_size, st.st_mtime_ns))
+        self.editor_lines = EditedLines(line_count)
+        if saved:  # 방금 정제해서 쓴 파일: 다음 저장 때 다시 훑지 않도록 정제 완료 표시를 캐시에 남김
+            ENCODING_CACHE.put(file_path, self.editor_encoding, st, TEXT_CLEANER.signature)
+            ENCODING_CACHE.save()
+
+    def editor_origin_clean(self):
+        # 연 뒤로 원본 파일이 바뀌지 않았고, 저장 인코딩 그대로 이미 정제된 상태인지 (그렇다면 편집한 곳만 정제하면 됨)
+        if not self.editor_origin or not can_page_file(self.editor_encoding): return False
+        path, stat = self.editor_origin
+        try:
+            st = os.stat(path)
+            if (st.st_size, st.st_mtime_ns) != stat: return False
+            return not needs_rewrite(TextBlockReader(path), self.editor_encoding)
+        except OSError:
+            return False
+
+    def editor_line_count(self):
+        return int(self.editor_text.index("end-1c").split(".")[0])
+
+    def editor_get_lines(self, first, last):
+        # 위젯의 first..last-1 줄 (0부터). 마지막 줄 뒤에 Tk 가 덧붙이는 줄바꿈은 빼고
+        end = f"{last + 1}.0" if last < self.editor_line_count() else "end-1c"
+        return self.editor_text.get(f"{first + 1}.0", end)
+
+    def editor_iter_blocks(self):
+        total = self.editor_line_count()
+        for a in range(0, total, EDITOR_SAVE_LINES):
+            yield self.editor_get_lines(a, min(a + EDITOR_SAVE_LINES, total))
+
+    def editor_write(self, file_path):
+        # 위젯 내용을 한 문자열로 꺼내지 않고 줄 묶음으로 흘려 임시 파일에 쓴 뒤 바꿔치기
+        # 원본이 이미 정제돼 있으면 편집하지 않은 줄들은 원본 바이트를 그대로 복사하고 편집한 곳만 정제
+        origin_clean = self.editor_origin_clean()
+        if self.editor_pages:
+            # 큰 파일: 원본 페이지 + 편집한 페이지를 이어 새 파일로 쓴 뒤, 저장된 파일로 페이지 색인을 다시 만듦
+            pages, first = self.editor_pages, self.editor_window[0]
+            pages.save(file_path, self.editor_live_pages(), self.editor_encoding, origin_clean=origin_clean)
+            top = self.editor_text.index("@0,0")
+            self.editor_close_pages()
+            self.editor_open_paged(file_path, self.editor_encoding, first)
+            self.editor_set_origin(file_path, 1, saved=True)
+            self.editor_text.yview(top)
+            return
+        if origin_clean and sum(n for _, n in self.editor_lines.runs) == self.editor_line_count():
+            with open(self.editor_origin[0], "rb") as f:
+                original = f.read()
+            pieces = self.editor_lines.iter_pieces(original, self.editor_get_lines)
+            write_spliced(file_path, pieces, self.editor_encoding)
+        else:
+            atomic_write_text(file_path, self.editor_iter_blocks(), self.editor_encoding)
+        # 저장한 파일이 새 원본 (정제해서 썼으므로 다음 저장부터는 편집한 곳만 다시 정제)
+        self.editor_set_origin(file_path, self.editor_line_count(), saved=True)
+
     # ---------- 병합 탭 ----------
     def setup_merge_tab(self):
         frame = ttk.Frame(self.notebook)
@@ -182,8 +2673,8 @@ class TextToolApp:
         tk.Button(btn_frame, text="폴더 불러오기", command=self.select_merge_folder, height=2).pack(side="left", padx=5)
         tk.Button(btn_frame, text="    선택 삭제    ", command=self.delete_selected_file, height=2).pack(side="left", padx=5)
         
-        self.merge_files = []
-        self.merge_listbox = tk.Listbox(frame, height=25, selectmode="multiple")
+        self.merge_files = FileCollection()
+        self.merge_listbox = VirtualListbox(frame, self.merge_files, height=25)
         self.merge_listbox.pack(fill="x", padx=10)
         
         input_frame = ttk.Frame(frame)
@@ -199,49 +2690,51 @@ class TextToolApp:
         self.merge_output_entry = ttk.Entry(input_frame, width=25)
         self.merge_output_entry.pack(side="left", padx=5, ipady=5)
         self.merge_output_entry.bind("<Button-1>", lambda e: self.merge_output_entry.focus_set()) # 키보드 픽스
+
+        ttk.Label(input_frame, text="작업 수:").pack(side="left", padx=(10, 0))
+        self.merge_workers_entry = ttk.Entry(input_frame, width=3)
+        self.merge_workers_entry.insert(0, str(min(4, os.cpu_count() or 1)))
+        self.merge_workers_entry.pack(side="left", padx=5, ipady=5)
+        self.merge_workers_entry.bind("<Button-1>", lambda e: self.merge_workers_entry.focus_set()) # 키보드 픽스
+
+        self.merge_incremental = tk.BooleanVar(value=True)
+        ttk.Checkbutton(frame, text="바뀐 묶음만 다시 병합 (manifest)", variable=self.merge_incremental).pack(anchor="w", padx=10)
         
-        tk.Button(frame, text="병합 시작", command=lambda: threading.Thread(target=self.run_merge_thread).start(), height=2, width=15).pack(pady=10)
+        tk.Button(frame, text="병합 시작", command=self.start_merge, height=2, width=15).pack(pady=10)
+
+    def set_merge_output_name(self, first_path):
+        self.merge_output_entry.delete(0, tk.END)
+        self.merge_output_entry.insert(0, merge_output_base(first_path))
 
     def select_merge_files(self):
-        files = filedialog.askopenfilenames(filetypes=[("Text files", "*.txt")])
+        files = filedialog.askopenfilenames(filetypes=[("Text files", "*.txt"), ("Split ZIP", "*.zip")])
         if files:
             self.update_auto_path(files[0])
             if not self.merge_files:
-                name = os.path.splitext(os.path.basename(files[0]))[0]
-                clean_name = re.sub(r'_\d{7,}$', '', name)
-                self.merge_output_entry.delete(0, tk.END)
-                self.merge_output_entry.insert(0, f"{clean_name}_M")
-            for f in files:
-                if f not in self.merge_files:
-                    self.merge_files.append(f)
-                    self.merge_listbox.insert(tk.END, os.path.basename(f))
+                self.set_merge_output_name(files[0])
+            self.merge_files.add(files)
+            self.merge_listbox.refresh()
 
     def select_merge_folder(self):
         folder = filedialog.askdirectory()
         if folder:
             self.save_path.set(folder)
-            files = [os.path.join(folder, f) for f in os.listdir(folder) if f.lower().endswith(".txt")]
-            files.sort()
-            if files and not self.merge_files:
-                name = os.path.splitext(os.path.basename(files[0]))[0]
-                clean_name = re.sub(r'_\d{7,}$', '', name)
-                self.merge_output_entry.delete(0, tk.END)
-                self.merge_output_entry.insert(0, f"{clean_name}_M")
-            for f in files:
-                if f not in self.merge_files:
-                    self.merge_files.append(f)
-                    self.merge_listbox.insert(tk.END, os.path.basename(f))
+            was_empty = not self.merge_files
+            self.merge_files.add_folder(folder)
+            if was_empty and self.merge_files:
+                self.set_merge_output_name(self.merge_files[0])
+            self.merge_listbox.refresh()
 
     def delete_selected_file(self):
         selection = self.merge_listbox.curselection()
         if not selection:
             messagebox.showwarning("경고", "삭제할 파일을 선택하세요.")
             return
-        for index in reversed(selection):
-            self.merge_listbox.delete(index)
-            del self.merge_files[index]
+        self.merge_files.remove_indices(selection)
+        self.merge_listbox.clear_selection()
 
-    def run_merge_thread(self):
+    def start_merge(self):
+        # 설정은 버튼을 누른 때의 값으로 고정해 대기열에 넣음 (기다리는 동안 화면을 바꿔도 영향 없음)
         if not self.merge_files: 
             messagebox.showwarning("경고", "병합할 파일을 선택해주세요.")
             return
@@ -252,43 +2745,47 @@ class TextToolApp:
         except ValueError:
             messagebox.showerror("오류", "묶음 크기에 숫자를 입력해주세요.")
             return
-        total_files = len(self.merge_files)
-        file_groups = [self.merge_files[i : i + group_size] for i in range(0, total_files, group_size)]
         try:
-            _, first_enc = read_text_with_autodetect(self.merge_files[0])
-            processed_count = 0
-            for group in file_groups:
-                def get_file_num(path):
-                    match = re.search(r'(\d+)\.txt$', path)
-                    return f"{int(match.group(1)):04d}" if match else "0000"
-                start_num = get_file_num(group[0])
-                end_num = get_file_num(group[-1])
-                output_filename = f"{output_base}_{start_num}-{end_num}.txt"
-                with open(os.path.join(save_dir, output_filename), "w", encoding=first_enc, errors="replace") as out:
-                    for f_path in group:
-                        content, _ = read_text_with_autodetect(f_path)
-                        out.write(self.final_clean_for_save(content) + "\n")
-                        processed_count += 1
-                        self.update_status(processed_count, total_files)
-            messagebox.showinfo("완료", "범위 지정 병합이 완료되었습니다.")
+            workers = max(1, int(self.merge_workers_entry.get().strip()))
+        except ValueError:
+            messagebox.showerror("오류", "작업 수에 숫자를 입력해주세요.")
+            return
+        files = FileCollection()
+        files.add(self.merge_files, self.merge_files.stats)
+        incremental = self.merge_incremental.get()
+        self.submit_job(f"병합 {output_base}", lambda job: self.run_merge_job(job, files, output_base, save_dir, group_size, workers, incremental))
+
+    def run_merge_job(self, job, files, output_base, save_dir, group_size, workers, incremental):
+        try:
+            self.progress_events.start(files.total_size())
+            _, _, built, skipped = run_merge(files, save_dir, output_base, group_size, workers, incremental, job.report, job.checkpoint)
+            note = f"\n(변경 없는 묶음 {skipped}개 건너뜀)" if skipped else ""
+            self.progress_events.dialog("info", "완료", f"범위 지정 병합이 완료되었습니다.{note}")
+        except JobCancelled:
+            raise
         except Exception as e: 
-            messagebox.showerror("오류", f"병합 중 오류 발생: {str(e)}")
+            self.progress_events.dialog("error", "오류", f"병합 중 오류 발생: {str(e)}")
         finally:
-            self.status_label.config(text="병합 처리 완료")
+            ENCODING_CACHE.save()
+            self.progress_events.status("병합 취소됨" if job.cancelled else "병합 처리 완료")
 
     # ---------- 분할 탭 ----------
     def setup_split_tab(self):
         frame = ttk.Frame(self.notebook)
         self.notebook.add(frame, text="    분  할    ")
         tk.Label(frame, text="", height=1).pack() 
-        tk.Button(frame, text="파일 선택", command=self.select_split_file, height=2, width=15).pack(pady=5)
+        sel_frame = ttk.Frame(frame)
+        sel_frame.pack(pady=5)
+        tk.Button(sel_frame, text="파일 선택", command=self.select_split_file, height=2, width=15).pack(side="left", padx=2)
+        tk.Button(sel_frame, text="폴더 일괄", command=self.select_split_folder, height=2, width=15).pack(side="left", padx=2)
         self.split_file = ""
+        self.split_batch = []  # 두 개 이상 고르면 일괄 분할 (책마다 하위 폴더)
         self.split_listbox = tk.Listbox(frame, height=3) # 높이 3 복구
         self.split_listbox.pack(fill="x", padx=10, pady=5)
         
         ttk.Label(frame, text="기준값:").pack()
         self.split_input_entry = ttk.Entry(frame)
-        self.split_input_entry.insert(0, r"\b第\d+章\b")
+        self.split_input_entry.insert(0, CHAPTER_PATTERN)
         self.split_input_entry.pack(fill="x", padx=10, ipady=10)
         self.split_input_entry.bind("<Button-1>", lambda e: self.split_input_entry.focus_set()) # 키보드 픽스
         
@@ -298,63 +2795,281 @@ class TextToolApp:
         ttk.Radiobutton(m_frame, text="정규식", variable=self.split_mode, value="regex").pack(side="left")
         ttk.Radiobutton(m_frame, text="글자수", variable=self.split_mode, value="chars").pack(side="left")
         ttk.Radiobutton(m_frame, text="라인수", variable=self.split_mode, value="lines").pack(side="left")
+        ttk.Radiobutton(m_frame, text="바이트", variable=self.split_mode, value="bytes").pack(side="left")
         
         ttk.Label(frame, text="저장 파일명:").pack()
         self.split_output_entry = ttk.Entry(frame)
         self.split_output_entry.pack(fill="x", padx=10, ipady=10)
         self.split_output_entry.bind("<Button-1>", lambda e: self.split_output_entry.focus_set()) # 키보드 픽스
+
+        c_frame = ttk.Frame(frame)
+        c_frame.pack(pady=5)
+        self.split_container = tk.StringVar(value="files")
+        ttk.Radiobutton(c_frame, text="개별 파일", variable=self.split_container, value="files").pack(side="left")
+        ttk.Radiobutton(c_frame, text="ZIP", variable=self.split_container, value="stored").pack(side="left")
+        ttk.Radiobutton(c_frame, text="ZIP(압축)", variable=self.split_container, value="deflate").pack(side="left")
+
+        self.split_use_index = tk.BooleanVar(value=False)
+        ttk.Checkbutton(frame, text="장 위치 색인 사용/저장 (정규식)", variable=self.split_use_index).pack()
+
+        w_frame = ttk.Frame(frame)
+        w_frame.pack(pady=5)
+        ttk.Label(w_frame, text="일괄 분할 작업 수:").pack(side="left")
+        self.split_workers_entry = ttk.Entry(w_frame, width=5)
+        self.split_workers_entry.insert(0, str(min(4, os.cpu_count() or 1)))
+        self.split_workers_entry.pack(side="left")
+        self.split_workers_entry.bind("<Button-1>", lambda e: self.split_workers_entry.focus_set()) # 키보드 픽스
+        # 64MB 이상 파일의 정규식 분할은 스트리밍이라, 이보다 긴 매치(예: 第[\s\S]+?章)는 작은 파일과 다르게 나뉠 수 있음
+        ttk.Label(w_frame, text=" 정규식 겹침(글자):").pack(side="left")
+        self.split_overlap_entry = ttk.Entry(w_frame, width=7)
+        self.split_overlap_entry.insert(0, str(SPLIT_OVERLAP))
+        self.split_overlap_entry.pack(side="left")
+        self.split_overlap_entry.bind("<Button-1>", lambda e: self.split_overlap_entry.focus_set()) # 키보드 픽스
         
-        tk.Button(frame, text="분할 시작", command=lambda: threading.Thread(target=self.run_split_thread).start(), height=2, width=15).pack(pady=10)
+        b_frame = ttk.Frame(frame)
+        b_frame.pack(pady=10)
+        tk.Button(b_frame, text="미리보기", command=self.start_split_preview, height=2, width=15).pack(side="left", padx=2)
+        tk.Button(b_frame, text="분할 시작", command=self.start_split, height=2, width=15).pack(side="left", padx=2)
 
     def select_split_file(self):
-        file = filedialog.askopenfilename(filetypes=[("Text files", "*.txt")])
-        if file:
-            self.split_file = file
+        files = filedialog.askopenfilenames(filetypes=[("Text files", "*.txt")])
+        if len(files) > 1:
+            self.set_split_batch(files)
+        elif files:
+            file = files[0]
+            self.split_file, self.split_batch = file, []
             self.split_listbox.delete(0, tk.END)
             self.split_listbox.insert(tk.END, os.path.basename(file))
             self.update_auto_path(file)
-            name = os.path.splitext(os.path.basename(file))[0]
-            clean_name = re.sub(r'_\d{7,}$', '', name)
             self.split_output_entry.delete(0, tk.END)
-            self.split_output_entry.insert(0, f"{clean_name}_S")
+            self.split_output_entry.insert(0, split_output_base(file))
 
-    def run_split_thread(self):
+    def select_split_folder(self):
+        folder = filedialog.askdirectory()
+        if folder:
+            self.set_split_batch([path for path, _ in scan_text_files(folder)])
+
+    def set_split_batch(self, files):
+        if not files: return
+        self.split_file, self.split_batch = "", list(files)
+        self.split_listbox.delete(0, tk.END)
+        self.split_listbox.insert(tk.END, f"일괄 분할: {len(files)}개 파일 (책마다 하위 폴더)")
+        for path in files[:50]:
+            self.split_listbox.insert(tk.END, os.path.basename(path))
+        self.update_auto_path(files[0])
+        self.split_output_entry.delete(0, tk.END)
+        self.split_output_entry.insert(0, "(파일마다 {이름}_S)")
+
+    def split_overlap(self):
+        # 겹침 글자 수 입력값, 잘못됐으면 알리고 None
+        try:
+            return max(1, int(self.split_overlap_entry.get().strip()))
+        except ValueError:
+            messagebox.showerror("오류", "겹침 글자 수에 숫자를 입력해주세요.")
+            return None
+
+    def start_split(self):
+        if self.split_batch:
+            return self.start_split_batch()
         if not self.split_file: return
+        file_path = self.split_file
         base = self.split_output_entry.get().strip()
         val = self.split_input_entry.get().strip()
         mode, save_dir = self.split_mode.get(), self.save_path.get()
+        container, use_index = self.split_container.get(), self.split_use_index.get()
+        overlap = self.split_overlap()
+        if overlap is None: return
+        self.submit_job(f"분할 {base}", lambda job: self.run_split_job(job, file_path, save_dir, base, mode, val, container, use_index, overlap))
+
+    def run_split_job(self, job, file_path, save_dir, base, mode, val, container, use_index, overlap=SPLIT_OVERLAP):
         try:
-            text, enc = read_text_with_autodetect(self.split_file)
-            text = self.final_clean_for_save(text)
-            if mode == "regex":
-                parts = re.split(f"({val})", text)
-                chunks, current = [], ""
-                for p in parts:
-                    if re.match(val, p):
-                        if current: chunks.append(current)
-                        current = p
-                    else: current += p
-                if current: chunks.append(current)
-            elif mode == "chars":
-                size = int(val)
-                chunks = [text[i:i+size] for i in range(0, len(text), size)]
-            else: # lines
-                size = int(val)
-                lines = text.splitlines(keepends=True)
-                chunks = ["".join(lines[i:i+size]) for i in range(0, len(lines), size)]
-            total = len(chunks)
-            for i, c in enumerate(chunks, 1):
-                filename = f"{base}_{i:07d}.txt"
-                with open(os.path.join(save_dir, filename), "w", encoding=enc, errors="replace") as f:
-                    f.write(c)
-                self.update_status(i, total)
-            messagebox.showinfo("완료", f"총 {total}개의 파일로 분할 완료되었습니다.")
+            self.progress_events.start(os.path.getsize(file_path))
+            total = split_file(file_path, save_dir, base, mode, val, container, use_index, job.report, overlap)
+            self.progress_events.dialog("info", "완료", f"총 {total}개의 파일로 분할 완료되었습니다.")
+        except JobCancelled:
+            raise
         except Exception as e: 
-            messagebox.showerror("오류", f"분할 중 오류 발생: {str(e)}")
+            self.progress_events.dialog("error", "오류", f"분할 중 오류 발생: {str(e)}")
         finally: 
-            self.status_label.config(text="분할 처리 종료")
+            ENCODING_CACHE.save()
+            self.progress_events.status("분할 취소됨" if job.cancelled else "분할 처리 종료")
+
+    def start_split_preview(self):
+        # 일괄 분할이면 첫 파일로 미리봄
+        file_path = self.split_batch[0] if self.split_batch else self.split_file
+        if not file_path: return
+        val, mode = self.split_input_entry.get().strip(), self.split_mode.get()
+        overlap = self.split_overlap()
+        if overlap is None: return
+        self.submit_job(f"미리보기 {os.path.basename(file_path)}", lambda job: self.run_split_preview_job(job, file_path, mode, val, overlap))
+
+    def run_split_preview_job(self, job, file_path, mode, val, overlap=SPLIT_OVERLAP):
+        try:
+            self.progress_events.status("미리보기 중...")
+            started = time.perf_counter()
+            preview = split_preview(file_path, mode, val, overlap=overlap)
+            title = f"{os.path.basename(file_path)} ({time.perf_counter() - started:.1f}초)"
+            self.progress_events.dialog("info", "분할 미리보기", f"{title}\n\n{format_split_preview(preview)}")
+        except Exception as e:
+            self.progress_events.dialog("error", "오류", f"미리보기 중 오류 발생: {str(e)}")
+        finally:
+            ENCODING_CACHE.save()
+            self.progress_events.status("미리보기 종료")
+
+    def start_split_batch(self):
+        files = list(self.split_batch)
+        val = self.split_input_entry.get().strip()
+        mode, save_dir = self.split_mode.get(), self.save_path.get()
+        container, use_index = self.split_container.get(), self.split_use_index.get()
+        try:
+            workers = max(1, int(self.split_workers_entry.get().strip()))
+        except ValueError:
+            messagebox.showerror("오류", "작업 수에 숫자를 입력해주세요.")
+            return
+        overlap = self.split_overlap()
+        if overlap is None: return
+        self.submit_job(f"일괄 분할 {len(files)}개", lambda job: self.run_split_batch_job(job, files, save_dir, mode, val, container, use_index, workers, overlap))
+
+    def run_split_batch_job(self, job, files, save_dir, mode, val, container, use_index, workers, overlap=SPLIT_OVERLAP):
+        try:
+            self.progress_events.start(sum(os.path.getsize(p) for p in files if os.path.exists(p)))
+            started = time.perf_counter()
+            results = run_split_batch(files, save_dir, mode, val, container, use_index, workers, job.report, job.checkpoint, overlap)
+            chunks = sum(r[1] for r in results)
+            failed = sum(1 for r in results if r[3])
+            head = f"{len(results)}개 파일 -> 총 {chunks}개 조각 ({time.perf_counter() - started:.1f}초)"
+            if failed: head += f", 실패 {failed}개"
+            self.progress_events.dialog("info", "완료", f"{head}\n\n{format_split_summary(results)}")
+        except JobCancelled:
+            raise
+        except Exception as e:
+            self.progress_events.dialog("error", "오류", f"분할 중 오류 발생: {str(e)}")
+        finally:
+            ENCODING_CACHE.save()
+            self.progress_events.status("분할 취소됨" if job.cancelled else "분할 처리 종료")
+
+# ---------- 명령줄 ----------
+# 화면 없이 병합/분할/정제/인코딩 확인 (서버의 cron 작업 등). 결과는 JSON 으로 표준 출력에
+#   python text_tool_0.4.py merge 폴더 -o 출력폴더 --group 5 --jobs 4
+#   python text_tool_0.4.py split 책.txt --mode regex --value "\b第\d+章\b" -o 출력폴더
+#   python text_tool_0.4.py clean 폴더 -o 출력폴더 --jobs 4   (-o 없으면 제자리에서)
+#   python text_tool_0.4.py detect 폴더
+
+def cli_inputs(paths, containers=True):
+    # 명령줄 입력: 파일은 그대로, 폴더는 안의 .txt 를 자연 정렬로, 분할 ZIP 은 안의 조각들로 (중복은 한 번만)
+    # containers=False: ZIP 조각("묶음.zip::조각.txt")은 병합에서만 열 수 있으므로 ZIP 입력을 거부
+    files = FileCollection()
+    for path in paths:
+        if os.path.isdir(path): files.add_folder(path)
+        elif not containers and (path.lower().endswith(".zip") or is_container_member(path)):
+            raise ValueError(f"ZIP 묶음은 병합에만 쓸 수 있습니다: {path}")
+        else: files.add([path])
+    return files
+
+def cli_parser():
+    parser = argparse.ArgumentParser(prog="texttool", description="텍스트 병합/분할/정제 (화면 없이)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    jobs_help = "동시에 처리할 프로세스 수"
+
+    merge = commands.add_parser("merge", help="파일들을 묶음 단위로 병합 ({이름}_{처음}-{끝}.txt)")
+    merge.add_argument("inputs", nargs="+", help="파일, 폴더 또는 분할 ZIP")
+    merge.add_argument("-o", "--output", default=".", help="저장 폴더")
+    merge.add_argument("--name", help="출력 이름 (기본: 첫 파일 이름 + _M)")
+    merge.add_argument("--group", type=int, default=5, help="묶음 크기")
+    merge.add_argument("--incremental", action="store_true", help="입력이 바뀌지 않은 묶음은 건너뜀")
+    merge.add_argument("--jobs", type=int, default=1, help=jobs_help)
+
+    split = commands.add_parser("split", help="파일을 조각으로 분할 ({이름}_0000001.txt)")
+    split.add_argument("inputs", nargs="+", help="파일 또는 폴더 (여러 개면 책마다 하위 폴더)")
+    split.add_argument("-o", "--output", default=".", help="저장 폴더")
+    split.add_argument("--mode", choices=("regex", "chars", "lines", "bytes"), default="regex")
+    split.add_argument("--value", help=f"정규식 또는 크기 (기본: {CHAPTER_PATTERN})")
+    split.add_argument("--overlap", type=int, default=SPLIT_OVERLAP,
+                       help=f"정규식 스트리밍 분할({SPLIT_STREAM_THRESHOLD >> 20}MB 이상 파일)의 겹침 글자 수. 매치가 이보다 길 수 있는 패턴이면 늘릴 것")
+    split.add_argument("--name", help="출력 이름 (파일이 하나일 때, 기본: 파일 이름 + _S)")
+    split.add_argument("--container", choices=("files",) + tuple(SPLIT_CONTAINERS), default="files")
+    split.add_argument("--index", action="store_true", help="장 위치 색인 사용 (정규식 모드)")
+    split.add_argument("--preview", action="store_true", help="파일을 쓰지 않고 분할 결과만 확인")
+    split.add_argument("--jobs", type=int, default=1, help=jobs_help)
+
+    clean = commands.add_parser("clean", help="깨진 기호 정제 (원래 인코딩 유지)")
+    clean.add_argument("inputs", nargs="+", help="파일 또는 폴더")
+    clean.add_argument("-o", "--output", help="저장 폴더 (없으면 제자리에서)")
+    clean.add_argument("--jobs", type=int, default=1, help=jobs_help)
+
+    detect = commands.add_parser("detect", help="인코딩 확인")
+    detect.add_argument("inputs", nargs="+", help="파일 또는 폴더")
+    detect.add_argument("--jobs", type=int, default=1, help=jobs_help)
+    return parser
+
+def cli_merge(args):
+    files = cli_inputs(args.inputs)
+    if not files: raise ValueError("병합할 파일이 없습니다.")
+    os.makedirs(args.output, exist_ok=True)
+    outputs, enc, built, skipped = run_merge(files, args.output, args.name, max(1, args.group), max(1, args.jobs), args.incremental)
+    return {"files": len(files), "encoding": enc, "outputs": outputs, "built": built, "skipped": skipped}
+
+def cli_split(args):
+    files = list(cli_inputs(args.inputs, containers=False))
+    if not files: raise ValueError("분할할 파일이 없습니다.")
+    val = args.value or (CHAPTER_PATTERN if args.mode == "regex" else None)
+    if val is None: raise ValueError(f"{args.mode} 모드에는 --value 가 필요합니다.")
+    overlap = max(1, args.overlap)
+    if args.preview:
+        return {"previews": [dict(split_preview(path, args.mode, val, overlap=overlap), input=path) for path in files]}
+    os.makedirs(args.output, exist_ok=True)
+    if len(files) == 1:
+        # 분할 탭에서 파일 하나를 고른 경우와 같게 저장 폴더에 바로 씀
+        path, base = files[0], args.name or split_output_base(files[0])
+        started = time.perf_counter()
+        count = split_file(path, args.output, base, args.mode, val, args.container, args.index, overlap=overlap)
+        return {"results": [{"input": path, "output": args.output, "chunks": count,
+                             "seconds": round(time.perf_counter() - started, 3), "error": None}]}
+    results = run_split_batch(files, args.output, args.mode, val, args.container, args.index, max(1, args.jobs), overlap=overlap)
+    return {"results": [{"input": path, "output": os.path.join(args.output, split_output_base(path)), "chunks": count,
+                         "seconds": round(seconds, 3), "error": error} for path, count, seconds, error in results]}
+
+def _clean_into(file_path, out_dir):
+    # 프로세스 풀에서 돌리는 clean 작업 하나 (out_dir 가 없으면 제자리에서)
+    return clean_file(file_path, os.path.join(out_dir, os.path.basename(file_path)) if out_dir else file_path)
+
+def cli_clean(args):
+    files = list(cli_inputs(args.inputs, containers=False))
+    if args.output: os.makedirs(args.output, exist_ok=True)
+    outputs = [os.path.join(args.output, os.path.basename(path)) if args.output else path for path in files]
+    if len(set(map(os.path.abspath, outputs))) < len(outputs):
+        raise ValueError("저장 폴더에서 이름이 겹치는 입력 파일이 있습니다.")
+    results = run_file_batch(_clean_into, files, (args.output,), max(1, args.jobs))
+    return {"results": [{"input": path, "output": out, "encoding": enc, "rewritten": rewritten,
+                         "seconds": round(seconds, 3), "error": error}
+                        for path, out, (enc, rewritten, seconds, error) in zip(files, outputs, results)]}
+
+def cli_detect(args):
+    files = list(cli_inputs(args.inputs, containers=False))
+    results = run_file_batch(detect_file, files, (), max(1, args.jobs))
+    return {"results": [{"input": path, "encoding": enc, "error": error} for path, (enc, error) in zip(files, results)]}
+
+CLI_COMMANDS = {"merge": cli_merge, "split": cli_split, "clean": cli_clean, "detect": cli_detect}
+
+def cli_main(argv=None):
+    # 반환값은 종료 코드: 0 성공, 1 실패가 하나라도 있음 (argparse 사용법 오류는 2)
+    args = cli_parser().parse_args(argv)
+    started = time.perf_counter()
+    try:
+        summary = CLI_COMMANDS[args.command](args)
+        errors = [r for r in summary.get("results", []) if r.get("error")]
+        summary = dict(command=args.command, ok=not errors, **summary)
+    except Exception as e:
+        summary = {"command": args.command, "ok": False, "error": str(e)}
+    finally:
+        ENCODING_CACHE.save()
+    summary["seconds"] = round(time.perf_counter() - started, 3)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary["ok"] else 1
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 or tk is None:
+        sys.exit(cli_main())
     root = tk.Tk()
     app = TextToolApp(root)
     root.mainloop()